@@ -0,0 +1,180 @@
+"""
+Admin Routes for Italian Alps Vacation Planner
+
+Trekking API integration settings, trail syncs and the status of background
+jobs.
+"""
+
+import logging
+import os
+
+from flask import Blueprint, current_app, jsonify, render_template, request, url_for
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('admin', __name__)
+
+# Modules the views import on first use, loaded up front in preload mode
+PRELOAD_MODULES = ('jobs', 'sync_history', 'trekking_api')
+
+
+# API routes for trekking integration
+@bp.route('/admin/trekking-api')
+def admin_trekking_api():
+    """Admin page for managing the trekking API integration."""
+    # Get the API key from environment variable
+    api_key = os.environ.get('TREKKING_API_KEY', '')
+    return render_template('admin/trekking_api.html', api_key=api_key)
+
+@bp.route('/api/trails/update-from-api', methods=['POST'])
+def update_trails_from_api():
+    """Start a background sync of trails from the external trekking API."""
+    try:
+        # Get parameters from request
+        data = request.json or {}
+        region = data.get('region', 'trentino-alto-adige')
+        limit = int(data.get('limit', 25))
+        resume = bool(data.get('resume', True))
+        full = bool(data.get('full', False))
+        
+        from jobs import submit_job
+        from trekking_api import run_trail_sync
+        
+        # Stream the changes since the last sync into the database, continuing an unfinished sync
+        job_id = submit_job(current_app._get_current_object(), 'trail_sync', run_trail_sync,
+                            region=region, limit=limit, resume=resume, full=full)
+        
+        return jsonify({
+            "status": "queued",
+            "job_id": job_id,
+            "status_url": url_for('admin.get_job_status', job_id=job_id)
+        }), 202
+    except Exception as e:
+        logger.error(f"Error starting trail sync: {str(e)}")
+        return jsonify({"error": str(e), "status": "error"}), 500
+
+@bp.route('/api/jobs/<job_id>')
+def get_job_status(job_id):
+    """Get the status and progress of a background job."""
+    from jobs import get_job
+    
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/api/trails/external-sources')
+def get_external_trail_sources():
+    """Get information about external trail data sources."""
+    sources = [
+        {
+            "name": "External Trekking API",
+            "description": "Official hiking trails data from our partner trekking application",
+            "url": "https://hiking-trails-api.example.com/",
+            "last_update": "2025-04-06T12:00:00Z",
+            "trail_count": 25
+        }
+    ]
+    return jsonify(sources)
+
+@bp.route('/api/admin/save-api-key', methods=['POST'])
+def save_api_key():
+    """Save the trekking API key."""
+    try:
+        data = request.json
+        api_key = data.get('api_key', '')
+        
+        # In a production environment, you would save this to a secure storage
+        # For this demo, we'll just print it to the console
+        logger.info(f"Saving API key: {api_key[:4]}{'*' * (len(api_key) - 4)}")
+        
+        # For a real implementation, you might set an environment variable
+        os.environ['TREKKING_API_KEY'] = api_key
+        
+        return jsonify({"success": True})
+    except Exception as e:
+        logger.error(f"Error saving API key: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/test-connection')
+def test_api_connection():
+    """Test the connection to the trekking API."""
+    try:
+        from trekking_api import fetch_trails_from_api
+        
+        # Try to fetch just one trail to test the connection
+        trails = fetch_trails_from_api(limit=1)
+        
+        if trails and len(trails) > 0:
+            return jsonify({"connected": True})
+        else:
+            return jsonify({"connected": False, "error": "API returned no data"})
+    except Exception as e:
+        logger.error(f"API connection test failed: {str(e)}")
+        return jsonify({"connected": False, "error": str(e)})
+
+@bp.route('/api/admin/connection-status')
+def api_connection_status():
+    """Check the status of the trekking API connection."""
+    api_key = os.environ.get('TREKKING_API_KEY', '')
+    
+    if not api_key:
+        return jsonify({"connected": False, "error": "No API key set"})
+    
+    try:
+        from trekking_api import fetch_trails_from_api
+        
+        # Try to fetch just one trail to test the connection
+        trails = fetch_trails_from_api(limit=1)
+        
+        if trails and len(trails) > 0:
+            return jsonify({"connected": True})
+        else:
+            return jsonify({"connected": False, "error": "API returned no data"})
+    except Exception as e:
+        logger.error(f"API connection check failed: {str(e)}")
+        return jsonify({"connected": False, "error": str(e)})
+
+@bp.route('/api/admin/save-settings', methods=['POST'])
+def save_api_settings():
+    """Save the trekking API settings."""
+    try:
+        data = request.json
+        
+        # In a production app, you would save these settings to a database
+        # For this demo, we'll just log them
+        logger.info(f"Saving API settings: {data}")
+        
+        return jsonify({"success": True})
+    except Exception as e:
+        logger.error(f"Error saving API settings: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/sync-history')
+def get_sync_history():
+    """Get the synchronization history."""
+    # In a production app, you would store this in a database
+    # For this demo, we'll return some sample data
+    history = [
+        {
+            "timestamp": "2025-04-06 12:30:15",
+            "status": "success",
+            "message": "Successfully imported 8 new trails from API"
+        },
+        {
+            "timestamp": "2025-04-05 08:15:22",
+            "status": "warning",
+            "message": "API rate limit reached, only 5 trails imported"
+        },
+        {
+            "timestamp": "2025-04-04 09:45:10",
+            "status": "error",
+            "message": "Connection failed: API key invalid"
+        }
+    ]
+    
+    # Add the saved entries, most recent first
+    from sync_history import load_sync_history
+    history = load_sync_history() + history
+    
+    return jsonify({"history": history})
@@ -0,0 +1,163 @@
+"""
+Benchmark for extract_clean_description
+
+Runs the keyword scorer and the previous implementation (kept
+below for comparison) over a corpus of saved pages, checks that both give
+identical descriptions and reports the speedup. Run from the project root:
+
+    python -m benchmarks.bench_description [--corpus DIR]
+
+The corpus is every .txt file in DIR (one page's main text per file, named
+after the trail), or by default the texts extracted into the HTTP cache. If
+neither has pages, a synthetic corpus of trail-like pages is generated.
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import timeit
+
+from http_cache import DEFAULT_CACHE_DIR
+from text_extraction import extract_clean_description
+
+VOCABULARY = (
+    "the a of to and in with for on at from by this that is are was views lake ridge summit "
+    "meadow forest valley hut rifugio cable car easy moderate steep loop return start parking "
+    "village hours km metres water spring summer winter snow Dolomites Trentino Alto Adige "
+    "hiking trail path route trek mountain hike difficulty scenic panoramic family children "
+    "distance elevation duration alpine Hiking TRAIL Panoramic Città Sentiero Über Straße"
+).split()
+
+TRAIL_NAMES = (
+    "Lago di Braies Circuit", "Seceda Ridgeline Trail", "Tre Cime di Lavaredo Circuit",
+    "Val di Genova Waterfall Path", "Rifugio Fuciade Family Trail"
+)
+
+
+def legacy_extract_clean_description(content, trail_name):
+    """The implementation replaced by KeywordScorer"""
+    # Remove extra whitespace
+    clean_content = re.sub(r'\s+', ' ', content).strip()
+
+    # Try to find a good paragraph to use (looking for keywords)
+    keywords = ['hiking', 'trail', 'path', 'route', 'trek', 'mountain', 'hike',
+                'difficulty', 'scenic', 'panoramic', 'family', 'children',
+                'distance', 'elevation', 'duration', 'alpine']
+
+    # Try to find paragraphs containing trail info
+    paragraphs = clean_content.split('. ')
+    relevant_paragraphs = []
+
+    for paragraph in paragraphs:
+        # Skip very short paragraphs
+        if len(paragraph.strip()) < 40:
+            continue
+
+        paragraph = paragraph.strip() + '.'
+        score = 0
+
+        # Score the paragraph based on keywords
+        for keyword in keywords:
+            if keyword.lower() in paragraph.lower():
+                score += 1
+
+        # If trail name is in paragraph, boost score
+        if trail_name.lower() in paragraph.lower():
+            score += 3
+
+        if score > 1:  # Only include if it has some relevance
+            relevant_paragraphs.append((paragraph, score))
+
+    # Sort by relevance score
+    relevant_paragraphs.sort(key=lambda x: x[1], reverse=True)
+
+    # Take top paragraphs up to ~500 chars
+    description = ""
+    char_count = 0
+
+    for paragraph, _ in relevant_paragraphs:
+        if char_count + len(paragraph) > 600:
+            break
+        description += " " + paragraph
+        char_count += len(paragraph)
+
+    # If no relevant paragraphs found, just take the first 500 characters
+    if not description:
+        description = clean_content[:500] + "..."
+
+    return description.strip()
+
+
+def load_corpus(directory):
+    """Read (trail name, text) pairs from .txt files, or from the HTTP cache's extracted texts"""
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, "*.txt")))
+    else:
+        paths = sorted(glob.glob(os.path.join(DEFAULT_CACHE_DIR, "objects", "*", "*.trafilatura")))
+
+    corpus = []
+    for index, path in enumerate(paths):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if not text:
+            continue
+        if directory:
+            name = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+        else:
+            name = TRAIL_NAMES[index % len(TRAIL_NAMES)]
+        corpus.append((name, text))
+    return corpus
+
+
+def synthetic_corpus(pages=200, sentences=400):
+    """Generate long trail-like pages mixing keywords, trail names and filler words"""
+    rng = random.Random(42)
+    corpus = []
+    for page in range(pages):
+        name = TRAIL_NAMES[page % len(TRAIL_NAMES)]
+        text = []
+        for _ in range(sentences):
+            words = rng.choices(VOCABULARY, k=rng.randint(3, 30))
+            if rng.random() < 0.05:
+                words.insert(rng.randint(0, len(words)), name)
+            separator = rng.choice([". ", ".\n\n", "  ", ". "])
+            text.append(" ".join(words) + separator)
+        corpus.append((name, "".join(text)))
+    return corpus
+
+
+def best_of(func, repeat=5):
+    """Return the fastest of several single runs, in milliseconds"""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", help="directory of .txt pages (default: the HTTP cache)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    source = args.corpus or DEFAULT_CACHE_DIR
+    if not corpus:
+        corpus = synthetic_corpus()
+        source = "synthetic"
+    total_chars = sum(len(text) for _, text in corpus)
+    print(f"Corpus: {len(corpus)} pages, {total_chars / 1e6:.1f} M characters ({source})")
+
+    mismatches = [
+        name for name, text in corpus
+        if extract_clean_description(text, name) != legacy_extract_clean_description(text, name)
+    ]
+    if mismatches:
+        raise SystemExit(f"Outputs differ for {len(mismatches)} pages, e.g. {mismatches[0]!r}")
+    print("Outputs identical for every page")
+
+    legacy = best_of(lambda: [legacy_extract_clean_description(text, name) for name, text in corpus])
+    single_pass = best_of(lambda: [extract_clean_description(text, name) for name, text in corpus])
+    print(f"legacy {legacy:9.2f} ms, keyword scorer {single_pass:9.2f} ms, speedup {legacy / single_pass:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark for the batched Haversine helpers
+
+Compares the scalar calculate_distance loop with haversine_many and
+haversine_matrix. Run from the project root:
+
+    python -m benchmarks.bench_haversine
+"""
+
+import random
+import timeit
+
+import geo
+from geo import calculate_distance, haversine_many, haversine_matrix
+
+# Roughly the area covered by the map
+LAT_RANGE = (45.5, 47.0)
+LNG_RANGE = (10.0, 13.0)
+
+
+def random_points(count):
+    """Generate random coordinates inside the map area"""
+    lats = [random.uniform(*LAT_RANGE) for _ in range(count)]
+    lngs = [random.uniform(*LNG_RANGE) for _ in range(count)]
+    return lats, lngs
+
+
+def best_of(func, repeat=5):
+    """Return the fastest of several single runs, in milliseconds"""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    random.seed(42)
+    print(f"NumPy available: {geo.get_numpy() is not None}")
+    
+    for count in (1_000, 10_000, 100_000):
+        lats, lngs = random_points(count)
+        origin_lat, origin_lng = 46.4, 11.9
+        
+        scalar = best_of(lambda: [calculate_distance(origin_lat, origin_lng, la, ln) for la, ln in zip(lats, lngs)])
+        batched = best_of(lambda: haversine_many(origin_lat, origin_lng, lats, lngs))
+        print(f"one-to-many {count:>7}: scalar {scalar:8.2f} ms, batched {batched:8.2f} ms, "
+              f"speedup {scalar / batched:5.1f}x")
+    
+    airbnb_lats, airbnb_lngs = random_points(300)
+    trail_lats, trail_lngs = random_points(5_000)
+    scalar = best_of(lambda: [
+        [calculate_distance(a_lat, a_lng, t_lat, t_lng) for t_lat, t_lng in zip(trail_lats, trail_lngs)]
+        for a_lat, a_lng in zip(airbnb_lats, airbnb_lngs)
+    ], repeat=1)
+    batched = best_of(lambda: haversine_matrix(airbnb_lats, airbnb_lngs, trail_lats, trail_lngs), repeat=1)
+    print(f"matrix 300x5000:     scalar {scalar:8.2f} ms, batched {batched:8.2f} ms, "
+          f"speedup {scalar / batched:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
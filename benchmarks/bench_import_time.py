@@ -0,0 +1,103 @@
+"""
+Import-time profile of the app
+
+Imports the WSGI entry point (main.py, what every worker loads) in a fresh
+interpreter under `python -X importtime`, reports the slowest modules and
+fails if the cold import exceeds a time budget or pulls in a module that is
+meant to be loaded on first use only. Run from the project root, e.g. in CI:
+
+    python -m benchmarks.bench_import_time [--budget-ms MS] [--preload AREAS]
+
+Exits with status 1 when the budget is exceeded. With --preload the app is
+imported in preload mode (APP_PRELOAD) and only the time is checked. The
+same checks run in the test suite (tests/test_import_time.py).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Cold import budget of main.py, measured under -X importtime (which adds overhead)
+DEFAULT_BUDGET_MS = 500
+
+# Modules the views import on first use; importing the app must not load them
+LAZY_MODULES = (
+    'trafilatura', 'bs4', 'lxml', 'requests', 'numpy',
+    'trekking_api', 'trail_enrichment', 'trail_recommendation', 'family_trails',
+    'page_parsing', 'text_extraction', 'http_cache', 'vector_tiles', 'jobs'
+)
+
+
+def profile_import(preload="", module="main"):
+    """
+    Import a module in a fresh interpreter under -X importtime
+    
+    Returns:
+        list: (module name, self µs, cumulative µs, nesting depth) per import
+    """
+    env = dict(os.environ, APP_PRELOAD=preload)
+    # An in-memory database: creating the app must not need a real one
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True
+    )
+    if process.returncode:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        raise SystemExit(f"FAILED: importing {module} raised an error\n" + "\n".join(errors[-5:]))
+    stderr = process.stderr
+    
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def import_time_ms(imports):
+    """Cumulative import time of main.py (everything it imported is nested under it)"""
+    return next(cumulative for name, _, cumulative, depth in imports if name == "main" and depth == 0) / 1000
+
+
+def eager_modules(imports):
+    """The LAZY_MODULES that were imported"""
+    imported = {name for name, _, _, _ in imports}
+    return [name for name in LAZY_MODULES if name in imported]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile and check the app's cold import time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="maximum cold import time")
+    parser.add_argument("--preload", default="", help="areas to preload, as in APP_PRELOAD")
+    parser.add_argument("--runs", type=int, default=3, help="imports profiled, the fastest is kept")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules shown")
+    args = parser.parse_args()
+    
+    profiles = [profile_import(args.preload) for _ in range(args.runs)]
+    total_ms, imports = min((import_time_ms(imports), imports) for imports in profiles)
+    
+    print(f"Slowest modules (self time, preload={args.preload or 'none'}):")
+    for name, self_us, cumulative_us, _ in sorted(imports, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+    print(f"Cold import of main.py: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if not args.preload:
+        eager = eager_modules(imports)
+        if eager:
+            failures.append(f"modules meant to load on first use were imported: {', '.join(eager)}")
+    
+    if failures:
+        raise SystemExit("FAILED: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Startup benchmark
+
+Measures how long a fresh process takes to import the app (what every web
+worker pays on start) and how long an idempotent re-run of the bootstrap
+takes on an already prepared database (what each worker used to pay on top
+when the bootstrap ran at import time, before any scraping). Also checks
+that importing the app opens no network connections. Run from the project
+root:
+
+    python -m benchmarks.bench_startup [--runs N] [--database-url URL]
+
+By default a temporary SQLite database is bootstrapped (without scraping)
+first.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Run in a fresh interpreter; prints the import time and the number of
+# network connections attempted while importing
+IMPORT_SCRIPT = """
+import socket, time
+connections = []
+connect = socket.socket.connect
+def counting_connect(self, address):
+    connections.append(address)
+    return connect(self, address)
+socket.socket.connect = counting_connect
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start, len(connections))
+"""
+
+BOOTSTRAP_SCRIPT = """
+import time
+from app import app
+from bootstrap import bootstrap
+start = time.perf_counter()
+with app.app_context():
+    bootstrap(scrape=False)
+print(time.perf_counter() - start)
+"""
+
+
+def run(script, database_url):
+    """Run a script in a fresh interpreter and return its printed values"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return [float(value) for value in output.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import and bootstrap times")
+    parser.add_argument("--runs", type=int, default=5, help="processes started per measurement")
+    parser.add_argument("--database-url", help="database to use (default: a temporary SQLite file)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ.setdefault("BOOTSTRAP_LOCK_FILE", os.path.join(directory, "bootstrap.lock"))
+        
+        first_bootstrap = run(BOOTSTRAP_SCRIPT, database_url)[0]
+        print(f"First bootstrap (without scraping): {first_bootstrap * 1000:9.1f} ms")
+        
+        imports = [run(IMPORT_SCRIPT, database_url) for _ in range(args.runs)]
+        import_times = [seconds for seconds, _ in imports]
+        connections = max(count for _, count in imports)
+        bootstraps = [run(BOOTSTRAP_SCRIPT, database_url)[0] for _ in range(args.runs)]
+    
+    print(f"Import app:                          {statistics.median(import_times) * 1000:9.1f} ms "
+          f"(median of {args.runs}, {int(connections)} network connections)")
+    print(f"Bootstrap re-run (already prepared): {statistics.median(bootstraps) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Bootstrap for Italian Alps Vacation Planner
+
+Prepares the database for the app: creates missing tables, applies schema
+upgrades, loads the default data into an empty database, scrapes family
+trails while fewer than FAMILY_TRAIL_MINIMUM exist and precomputes the
+nearby trails of every Airbnb. Importing the app does none of this, so web
+workers start without touching the network; run the bootstrap once per
+deployment before starting them:
+
+    python bootstrap.py [--skip-scraping]
+    gunicorn --bind 0.0.0.0:5000 main:app
+
+Every step checks the current state first, so running it again is cheap and
+changes nothing. A lock makes concurrent runs (e.g. several containers
+starting at once) wait for the first one instead of repeating its work.
+"""
+
+import argparse
+import contextlib
+import fcntl
+import logging
+import os
+import time
+
+from sqlalchemy import or_, text
+
+from app import db
+from models import POI, AirbnbNearbyTrail, Category
+
+logger = logging.getLogger(__name__)
+
+# Scrape family trails while the trails category has fewer than this many
+FAMILY_TRAIL_MINIMUM = 5
+
+# Words marking a trail as family-friendly in its name or description
+FAMILY_WORDS = ('family', 'child', 'kid')
+
+# Lock file used on databases without advisory locks (e.g. SQLite)
+BOOTSTRAP_LOCK_FILE = os.environ.get("BOOTSTRAP_LOCK_FILE", "bootstrap.lock")
+
+# PostgreSQL advisory lock key of the bootstrap
+ADVISORY_LOCK_KEY = 720341
+
+
+@contextlib.contextmanager
+def bootstrap_lock():
+    """
+    Hold a lock shared by every process bootstrapping the same database
+    
+    PostgreSQL databases use a session advisory lock, so processes on
+    different hosts are serialized too; other databases use an exclusive
+    lock on BOOTSTRAP_LOCK_FILE.
+    """
+    if db.engine.dialect.name == "postgresql":
+        with db.engine.connect() as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        return
+    
+    with open(BOOTSTRAP_LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def count_family_trails(category_id):
+    """Number of trails in the category whose name or description mentions families or children"""
+    return POI.query.filter(
+        POI.category_id == category_id,
+        or_(*(column.ilike(f'%{word}%') for word in FAMILY_WORDS for column in (POI.name, POI.description)))
+    ).count()
+
+
+def bootstrap(scrape=True):
+    """
+    Create and fill the database, skipping the steps already done
+    
+    Must be called inside an app context.
+    
+    Args:
+        scrape (bool): Whether to scrape family trails if there are too few
+    
+    Returns:
+        dict: What was done: populated, family_trails_added and nearby_trails_built
+    """
+    result = {"populated": False, "family_trails_added": 0, "nearby_trails_built": False}
+    
+    with bootstrap_lock():
+        db.create_all()
+        from migrations import upgrade_schema
+        upgrade_schema()
+        
+        # Initialize the database with default categories if empty
+        if Category.query.count() == 0:
+            from initialize_db import populate_database
+            populate_database()
+            db.session.commit()
+            result["populated"] = True
+            logger.info("Database initialized with default data")
+        
+        # Check if we need to add family trails
+        trails_category = Category.query.filter_by(name='trails').first()
+        if not trails_category:
+            logger.warning("Trails category not found, can't add family trails")
+        elif scrape and count_family_trails(trails_category.id) < FAMILY_TRAIL_MINIMUM:
+            # Not enough family trails, add more
+            try:
+                from family_trails import add_family_trails_to_database
+                result["family_trails_added"] = add_family_trails_to_database()
+                logger.info(f"Added {result['family_trails_added']} new family-friendly trails to database")
+            except Exception as e:
+                logger.error(f"Error adding family trails: {str(e)}")
+        
+        # Build the precomputed Airbnb -> trail distances on first start
+        if AirbnbNearbyTrail.query.first() is None:
+            try:
+                from trail_recommendation import rebuild_nearby_trails
+                rebuild_nearby_trails()
+                result["nearby_trails_built"] = True
+            except Exception as e:
+                logger.error(f"Error precomputing nearby trails: {str(e)}")
+    
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and fill the Italian Alps Vacation Planner database")
+    parser.add_argument("--skip-scraping", action="store_true",
+                        help="do not scrape family trails, even if there are too few")
+    args = parser.parse_args()
+    
+    # Created here rather than at import: the processes parsing scraped pages
+    # import this module again when it is run as a script
+    from app import app
+    
+    start = time.perf_counter()
+    with app.app_context():
+        result = bootstrap(scrape=not args.skip_scraping)
+    logger.info(f"Bootstrap finished in {time.perf_counter() - start:.1f} s: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Marker clustering for Italian Alps Vacation Planner
+
+POIs are clustered per category on a grid whose cell size matches a fixed
+number of screen pixels at each zoom level. Levels are built hierarchically:
+the clusters of one zoom level are merged into the coarser grid of the level
+above. All levels are computed once per dataset version and kept in memory.
+"""
+
+import logging
+import math
+import threading
+
+from dataset_cache import get_dataset_version
+from geo import path_for_zoom
+from models import POI, Category, db
+
+logger = logging.getLogger(__name__)
+
+# Highest zoom level served as clusters; the map shows individual markers above it
+CLUSTER_MAX_ZOOM = 9
+
+# Size of a cluster cell on screen, in pixels
+CLUSTER_RADIUS_PX = 60
+
+_levels_lock = threading.Lock()
+_levels = (None, {})  # (dataset version, {category: {zoom: [cluster, ...]}})
+
+
+def _cell_size_deg(zoom):
+    """Width in degrees of a cluster cell at a zoom level"""
+    return CLUSTER_RADIUS_PX * 360.0 / (256 * 2 ** zoom)
+
+
+def _merge(clusters, zoom):
+    """Merge clusters whose centroids fall into the same grid cell at a zoom level"""
+    cell_size = _cell_size_deg(zoom)
+    cells = {}
+    for cluster in clusters:
+        key = (math.floor(cluster['lat'] / cell_size), math.floor(cluster['lng'] / cell_size))
+        cells.setdefault(key, []).append(cluster)
+    
+    merged = []
+    for members in cells.values():
+        if len(members) == 1:
+            merged.append(members[0])
+            continue
+        count = sum(member['count'] for member in members)
+        merged.append({
+            'lat': sum(member['lat'] * member['count'] for member in members) / count,
+            'lng': sum(member['lng'] * member['count'] for member in members) / count,
+            'count': count
+        })
+    return merged
+
+
+def build_cluster_levels(points):
+    """
+    Cluster points for every zoom level from CLUSTER_MAX_ZOOM down to 0
+    
+    Args:
+        points (list): (poi_id, lat, lng) tuples
+        
+    Returns:
+        dict: zoom -> list of clusters ({'lat', 'lng', 'count'}, plus 'id'
+        for clusters holding a single POI)
+    """
+    clusters = [{'id': poi_id, 'lat': lat, 'lng': lng, 'count': 1} for poi_id, lat, lng in points]
+    levels = {}
+    for zoom in range(CLUSTER_MAX_ZOOM, -1, -1):
+        clusters = _merge(clusters, zoom)
+        levels[zoom] = clusters
+    return levels
+
+
+def get_cluster_levels():
+    """Return the cluster levels per category for the current dataset version"""
+    global _levels
+    
+    version = get_dataset_version()
+    with _levels_lock:
+        if _levels[0] == version:
+            return _levels[1]
+    
+    rows = db.session.query(Category.name, POI.id, POI.lat, POI.lng).join(
+        POI, POI.category_id == Category.id
+    ).all()
+    points_by_category = {}
+    for category_name, poi_id, lat, lng in rows:
+        points_by_category.setdefault(category_name, []).append((poi_id, lat, lng))
+    
+    levels = {
+        category_name: build_cluster_levels(points)
+        for category_name, points in points_by_category.items()
+    }
+    with _levels_lock:
+        _levels = (version, levels)
+    logger.info(f"Built marker clusters for {len(rows)} POIs (dataset version {version})")
+    return levels
+
+
+def get_clusters(zoom, bbox=None, categories=None):
+    """
+    Get the clusters to draw for a zoom level and viewport
+    
+    Args:
+        zoom (int): Map zoom level, clamped to 0..CLUSTER_MAX_ZOOM
+        bbox (tuple, optional): (south, west, north, east) viewport
+        categories (list, optional): Restrict the result to these category names
+        
+    Returns:
+        dict: Category name -> list of clusters; a cluster holding a single
+        POI also carries the serialized POI under 'poi', so the map can draw
+        it as a plain marker
+    """
+    zoom = max(0, min(zoom, CLUSTER_MAX_ZOOM))
+    result = {}
+    for category_name, levels in get_cluster_levels().items():
+        if categories and category_name not in categories:
+            continue
+        clusters = levels[zoom]
+        if bbox:
+            south, west, north, east = bbox
+            clusters = [
+                cluster for cluster in clusters
+                if south <= cluster['lat'] <= north and west <= cluster['lng'] <= east
+            ]
+        result[category_name] = clusters
+    
+    # One query for the details of every single-POI cluster in view
+    single_ids = [cluster['id'] for clusters in result.values() for cluster in clusters if cluster['count'] == 1]
+    if not single_ids:
+        return result
+    pois = {}
+    for row in db.session.query(
+        POI.id, POI.name, POI.lat, POI.lng, POI.description, POI.url,
+        POI.path_polyline, POI.path_simplified, POI.difficulty_rating, POI.rating_count
+    ).filter(POI.id.in_(single_ids)):
+        poi = POI.row_to_dict(row)
+        poi['path'] = path_for_zoom(row.path_polyline, row.path_simplified, zoom)
+        pois[row.id] = poi
+    
+    # The cached levels are shared, so copy the clusters given details
+    return {
+        category_name: [
+            dict(cluster, poi=pois[cluster['id']]) if cluster['count'] == 1 and cluster['id'] in pois else cluster
+            for cluster in clusters
+        ]
+        for category_name, clusters in result.items()
+    }
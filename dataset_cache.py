@@ -0,0 +1,138 @@
+"""
+Dataset versioning and response caching for Italian Alps Vacation Planner
+
+Every write to POIs, categories or Airbnbs bumps a version counter stored in
+the database (in the same transaction as the write). JSON endpoints serving
+the map data use it as a strong ETag and keep a pre-serialized body per
+version, so unchanged data costs neither a data query nor JSON encoding.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import Airbnb, Category, DatasetVersion, POI, db
+
+logger = logging.getLogger(__name__)
+
+# Name of the counter covering everything shown on the map
+MAP_DATASET = "map"
+
+# Models whose changes invalidate cached map responses
+VERSIONED_MODELS = (POI, Category, Airbnb)
+
+# Maximum number of cached response bodies kept in this process
+MAX_CACHED_RESPONSES = 256
+
+# Session flag set when a flush touches versioned data
+_CHANGED_KEY = "dataset_changed"
+
+_cache_lock = threading.Lock()
+_response_cache = OrderedDict()  # cache_key -> (version, body)
+
+
+def get_dataset_version(name=MAP_DATASET):
+    """Return the current version of a dataset (0 if it was never written)"""
+    version = db.session.execute(
+        select(DatasetVersion.version).where(DatasetVersion.name == name)
+    ).scalar()
+    return version or 0
+
+
+def bump_dataset_version(connection, name=MAP_DATASET):
+    """
+    Increment a dataset version on the given connection
+    
+    The statement runs on the Core connection so it joins the caller's
+    transaction without going through the ORM events again.
+    """
+    result = connection.execute(
+        update(DatasetVersion.__table__)
+        .where(DatasetVersion.__table__.c.name == name)
+        .values(version=DatasetVersion.__table__.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(DatasetVersion.__table__).values(name=name, version=1))
+
+
+def cached_json_response(cache_key, build):
+    """
+    Serve JSON data with a strong ETag and a per-version cached body
+    
+    Args:
+        cache_key (str): Identifies the response (endpoint plus parameters)
+        build (callable): Returns the data to serialize on a cache miss
+        
+    Returns:
+        Response: 304 if the client's copy is current, else the JSON body
+    """
+    # Read the version before the data so a concurrent write can only make
+    # the cached body newer than its version, never older
+    version = get_dataset_version()
+    key_hash = hashlib.sha1(cache_key.encode("utf-8")).hexdigest()[:16]
+    etag = f"v{version}-{key_hash}"
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        with _cache_lock:
+            cached = _response_cache.get(cache_key)
+            if cached is not None and cached[0] == version:
+                _response_cache.move_to_end(cache_key)
+                body = cached[1]
+            else:
+                body = None
+        
+        if body is None:
+            body = current_app.json.dumps(build()).encode("utf-8")
+            with _cache_lock:
+                _response_cache[cache_key] = (version, body)
+                _response_cache.move_to_end(cache_key)
+                while len(_response_cache) > MAX_CACHED_RESPONSES:
+                    _response_cache.popitem(last=False)
+        
+        response = Response(body, mimetype="application/json")
+    
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate it on every use
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+# Flag the session whenever a flush or bulk statement touches versioned data,
+# and bump the version once, at commit. Bumping after all of the transaction's
+# data writes keeps one lock order (data rows, then the version row) in every
+# writer, and holds the version row lock only for the end of the commit.
+@event.listens_for(Session, "before_flush")
+def _detect_changes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, VERSIONED_MODELS) and (obj not in session.dirty or session.is_modified(obj)):
+            session.info[_CHANGED_KEY] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _detect_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, VERSIONED_MODELS):
+        orm_execute_state.session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session):
+    # Flush first: the commit's own flush runs after this event
+    session.flush()
+    if session.info.pop(_CHANGED_KEY, False):
+        bump_dataset_version(session.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop(_CHANGED_KEY, None)
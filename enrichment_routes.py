@@ -0,0 +1,91 @@
+"""
+Enrichment Routes for Italian Alps Vacation Planner
+
+Pages starting background jobs that fill in trail descriptions from the
+trails' web pages.
+"""
+
+import logging
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('enrichment', __name__)
+
+# Modules the views import on first use, loaded up front in preload mode
+PRELOAD_MODULES = ('jobs', 'trail_enrichment')
+
+
+@bp.route('/enrich-trails', methods=['GET', 'POST'])
+def enrich_trails_page():
+    """Show the trail enrichment page."""
+    from models import POI, Category
+    from trail_enrichment import get_trails_without_descriptions
+    
+    trails = get_trails_without_descriptions()
+    
+    # Get stats for all trails
+    trails_category = Category.query.filter_by(name="trails").first()
+    stats = None
+    
+    if trails_category:
+        total_trails = POI.query.filter_by(category_id=trails_category.id).count()
+        trails_with_descriptions = POI.query.filter_by(category_id=trails_category.id).filter(
+            POI.description.isnot(None), 
+            POI.description != '',
+            db.func.length(POI.description) >= 50
+        ).count()
+        
+        stats = {
+            "total": total_trails,
+            "with_descriptions": trails_with_descriptions,
+            "needs_descriptions": total_trails - trails_with_descriptions
+        }
+    
+    # If POST request, start enriching trails in the background
+    if request.method == 'POST':
+        try:
+            from jobs import submit_job
+            from trail_enrichment import batch_enrich_trails
+            
+            limit = int(request.form.get('limit', 3))
+            job_id = submit_job(current_app._get_current_object(), 'enrich_trails', batch_enrich_trails, limit=limit)
+            
+            flash('Trail data enrichment started, progress is shown below.', 'success')
+            return redirect(url_for('enrichment.enrich_trails_page', job=job_id))
+        except Exception as e:
+            flash(f'Error enriching trail data: {str(e)}', 'error')
+    
+    # Show the progress, or the result, of an enrichment job
+    job = None
+    result = None
+    if request.args.get('job'):
+        from jobs import get_job
+        job = get_job(request.args['job'])
+        if job and job.status == 'succeeded' and job.kind == 'enrich_trails':
+            result = job.result
+    
+    return render_template('enrich_trails.html', trails=trails, stats=stats, result=result, job=job)
+
+@bp.route('/enrich-trail/<int:trail_id>', methods=['POST'])
+def enrich_single_trail(trail_id):
+    """Start enriching a single trail's data in the background."""
+    try:
+        from models import POI
+        from jobs import submit_job
+        from trail_enrichment import enrich_trail_by_id
+        
+        # Get the trail
+        trail = POI.query.get_or_404(trail_id)
+        
+        # Enrich the trail data
+        job_id = submit_job(current_app._get_current_object(), 'enrich_trail', enrich_trail_by_id, trail.id)
+        
+        flash(f'Started enriching data for trail: {trail.name}', 'success')
+        return redirect(url_for('enrichment.enrich_trails_page', job=job_id))
+    except Exception as e:
+        flash(f'Error enriching trail data: {str(e)}', 'error')
+        return redirect(url_for('enrichment.enrich_trails_page'))
@@ -1,149 +1,132 @@
 import logging
-from app import db
-from models import POI, Category
-import trafilatura
-import re
+import os
+from trail_import import import_trails
+from page_parsing import fetch_and_parse
+from trail_enrichment import HostRateLimiter, fetch_page
+from text_extraction import extract_family_trail_sections
+from http_cache import get_http_cache
+import json
 import random
-from bs4 import BeautifulSoup
-import requests
-import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def scrape_family_trails():
-    """Scrape family-friendly hiking trails from several dedicated sources"""
-    trails = []
+# Sources focused on family hiking in the Italian Alps
+FAMILY_TRAIL_SOURCES = [
+    {
+        "url": "https://www.livigno.eu/en/hiking-with-children",
+        "region": "Livigno",
+        "base_lat": 46.5384, 
+        "base_lng": 10.1357
+    },
+    {
+        "url": "https://www.val-gardena.org/en/activities/summer/hiking-trekking/hiking-with-children/",
+        "region": "Val Gardena",
+        "base_lat": 46.5572, 
+        "base_lng": 11.6669
+    },
+    {
+        "url": "https://www.dolomiti.it/en/activities/with-children",
+        "region": "Dolomites",
+        "base_lat": 46.4102, 
+        "base_lng": 11.8449
+    },
+    {
+        "url": "https://www.trentino.com/en/highlights/trekking-and-hiking/trekking-with-children/",
+        "region": "Trentino",
+        "base_lat": 46.0664, 
+        "base_lng": 11.1242
+    }
+]
+
+# Concurrency limits of the scraper
+SOURCE_FETCH_WORKERS = 8  # Sources downloaded in parallel
+DOMAIN_DELAY = 1.0  # Seconds between requests to the same domain
+PARSE_PROCESSES = max(1, (os.cpu_count() or 2) - 1)  # Processes parsing pages
+
+# Name under which parsed trail lists are cached with the page bodies
+SECTIONS_CACHE_NAME = "family-trails"
+
+
+def scrape_family_trails(sources=None):
+    """
+    Scrape family-friendly hiking trails from several dedicated sources
+    
+    Sources are downloaded concurrently, through the HTTP cache and at most
+    one request per DOMAIN_DELAY seconds to each domain, and each page is
+    parsed once in a pool of worker processes as soon as it arrives. The
+    trails found on an unchanged page are served from the cache without
+    parsing it again.
+    
+    Args:
+        sources (list): Dicts with url, region, base_lat and base_lng,
+            FAMILY_TRAIL_SOURCES if not given
     
-    # Sources focused on family hiking in the Italian Alps
-    sources = [
-        {
-            "url": "https://www.livigno.eu/en/hiking-with-children",
-            "region": "Livigno",
-            "base_lat": 46.5384, 
-            "base_lng": 10.1357
-        },
-        {
-            "url": "https://www.val-gardena.org/en/activities/summer/hiking-trekking/hiking-with-children/",
-            "region": "Val Gardena",
-            "base_lat": 46.5572, 
-            "base_lng": 11.6669
-        },
-        {
-            "url": "https://www.dolomiti.it/en/activities/with-children",
-            "region": "Dolomites",
-            "base_lat": 46.4102, 
-            "base_lng": 11.8449
-        },
-        {
-            "url": "https://www.trentino.com/en/highlights/trekking-and-hiking/trekking-with-children/",
-            "region": "Trentino",
-            "base_lat": 46.0664, 
-            "base_lng": 11.1242
-        }
-    ]
-    
-    for source in sources:
+    Returns:
+        list: Trail dicts with name, description, url, lat, lng and path
+    """
+    sources = FAMILY_TRAIL_SOURCES if sources is None else sources
+    cache = get_http_cache()
+    domain_delay = HostRateLimiter(DOMAIN_DELAY)
+    sections_by_source = {}
+    
+    def fetch(item):
+        _, source = item
+        logger.info(f"Scraping family trails from {source['url']}")
+        return fetch_page(source['url'], domain_delay.for_url(source['url']))
+    
+    def parse_task(item, page):
+        index, _ = item
+        cached = cache.get_text(page.content_hash, name=SECTIONS_CACHE_NAME)
+        if cached is not None:
+            sections_by_source[index] = json.loads(cached)
+            return None
+        return extract_family_trail_sections, (page.content,)
+    
+    pages = fetch_and_parse(
+        list(enumerate(sources)), fetch, parse_task, SOURCE_FETCH_WORKERS, PARSE_PROCESSES, "family-fetch"
+    )
+    for (index, source), page, parsed in pages:
+        if parsed is None:
+            continue
         try:
-            logger.info(f"Scraping family trails from {source['url']}")
-            
-            # Download the content
-            response = requests.get(source['url'], timeout=10)
-            response.raise_for_status()
-            
-            # Parse with BeautifulSoup for better extraction of trail elements
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract main text content with trafilatura for description
-            downloaded = trafilatura.extract(response.content)
-            
-            # Look for trail sections
-            trail_sections = []
-            
-            # Different websites have different structures - try various selectors
-            for section in soup.select('article, .trail-item, .hike-item, .card, .excursion-item, .content-block'):
-                trail_name = None
-                trail_desc = None
-                trail_url = None
-                
-                # Try to find the trail name from headers or strong texts
-                name_elem = section.select_one('h2, h3, h4, strong.title, .card-title')
-                if name_elem and 'family' in name_elem.text.lower() or 'child' in name_elem.text.lower() or 'kid' in name_elem.text.lower():
-                    trail_name = name_elem.text.strip()
-                    
-                    # Look for description
-                    desc_elem = section.select_one('p, .description, .card-text')
-                    if desc_elem:
-                        trail_desc = desc_elem.text.strip()
-                    
-                    # Look for URL
-                    url_elem = section.select_one('a')
-                    if url_elem and url_elem.has_attr('href'):
-                        href = url_elem['href']
-                        if href.startswith('/'):
-                            # Convert relative URL to absolute
-                            base_url = '/'.join(source['url'].split('/')[:3])
-                            trail_url = f"{base_url}{href}"
-                        elif href.startswith('http'):
-                            trail_url = href
-                            
-                    if trail_name:
-                        trail_sections.append({
-                            'name': f"{trail_name} - {source['region']}",
-                            'description': trail_desc or f"Family-friendly hiking trail in {source['region']}",
-                            'url': trail_url or source['url'],
-                            'region': source['region'],
-                            'base_lat': source['base_lat'],
-                            'base_lng': source['base_lng']
-                        })
-            
-            # If no structured elements were found, extract from the general text
-            if len(trail_sections) == 0:
-                # Look for "family" or "children" keywords in paragraphs
-                for para in soup.select('p'):
-                    text = para.text.strip().lower()
-                    if ('family' in text or 'children' in text or 'kid' in text) and len(text) > 100:
-                        # This might be a trail description
-                        # Look for potential trail names in nearby headings
-                        prev_heading = para.find_previous(['h1', 'h2', 'h3', 'h4'])
-                        if prev_heading:
-                            trail_name = prev_heading.text.strip()
-                            trail_desc = para.text.strip()
-                            
-                            trail_sections.append({
-                                'name': f"{trail_name} - {source['region']}",
-                                'description': trail_desc,
-                                'url': source['url'],
-                                'region': source['region'],
-                                'base_lat': source['base_lat'],
-                                'base_lng': source['base_lng']
-                            })
-            
-            # Add the scraped trail sections
-            for trail in trail_sections:
-                # Generate a random path around the base coordinates
-                path = create_family_trail_path(trail['base_lat'], trail['base_lng'])
-                
-                trails.append({
-                    'name': trail['name'],
-                    'description': trail['description'],
-                    'url': trail['url'],
-                    'lat': path[0]['lat'],  # Start point latitude
-                    'lng': path[0]['lng'],  # Start point longitude
-                    'path': path
-                })
-                
-            # Ensure we don't hammer the servers
-            time.sleep(1)
-                
+            sections = parsed.result()
         except Exception as e:
-            logger.error(f"Error scraping {source['url']}: {str(e)}")
+            logger.error(f"Error parsing {source['url']}: {str(e)}")
             continue
-            
+        cache.put_text(page.content_hash, json.dumps(sections), name=SECTIONS_CACHE_NAME)
+        sections_by_source[index] = sections
+    
+    # Keep the order of the sources, whichever finished first
+    trails = []
+    for index, source in enumerate(sources):
+        for trail_name, trail_desc, href in sections_by_source.get(index, []):
+            trails.append(_family_trail(source, trail_name, trail_desc, href))
+    
     logger.info(f"Scraped {len(trails)} family-friendly trails")
     return trails
 
+def _family_trail(source, trail_name, trail_desc, href):
+    """Build a trail dict from an entry found on a source page"""
+    trail_url = None
+    if href and href.startswith('/'):
+        # Convert relative URL to absolute
+        base_url = '/'.join(source['url'].split('/')[:3])
+        trail_url = f"{base_url}{href}"
+    elif href and href.startswith('http'):
+        trail_url = href
+    
+    # Generate a random path around the base coordinates
+    path = create_family_trail_path(source['base_lat'], source['base_lng'])
+    
+    return {
+        'name': f"{trail_name} - {source['region']}",
+        'description': trail_desc or f"Family-friendly hiking trail in {source['region']}",
+        'url': trail_url or source['url'],
+        'lat': path[0]['lat'],  # Start point latitude
+        'lng': path[0]['lng'],  # Start point longitude
+        'path': path
+    }
+
 def create_family_trail_path(base_lat, base_lng):
     """Create a family-friendly trail path based on base coordinates
     
@@ -190,44 +173,17 @@ def add_family_trails_to_database():
     """Add family-friendly trails to the database"""
     logger.info("Adding scraped family-friendly trails to database")
     
-    # Get the trails category
-    category = Category.query.filter_by(name='trails').first()
-    if not category:
-        logger.error("Trails category not found!")
-        return
-    
     # Scrape family trails
     trails = scrape_family_trails()
-    
-    # Count only new trails added
-    count_added = 0
-    
-    # Add each trail to the database
     for trail in trails:
-        # Check if a trail with this name already exists
-        existing_trail = POI.query.filter_by(name=trail['name'], category_id=category.id).first()
-        
-        if not existing_trail:
-            # Create new trail
-            new_trail = POI(
-                name=trail['name'],
-                lat=trail['lat'],
-                lng=trail['lng'],
-                description=trail['description'],
-                url=trail['url'],
-                category_id=category.id,
-                path=trail['path'],
-                difficulty_rating=1.5  # Family trails are easier
-            )
-            
-            db.session.add(new_trail)
-            count_added += 1
+        trail['difficulty_rating'] = 1.5  # Family trails are easier
     
-    # Commit changes
-    db.session.commit()
+    # Insert the trails whose name is new, in batches
+    result = import_trails(trails, category_name='trails')
     
-    logger.info(f"Added {count_added} new family-friendly trails to database")
-    return count_added
+    logger.info(f"Added {result['inserted']} new family-friendly trails to database "
+                f"({result['skipped']} already present)")
+    return result['inserted']
 
 if __name__ == "__main__":
     # When run as a script, add the trails to the database
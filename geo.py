@@ -0,0 +1,412 @@
+"""
+Geographic helpers for Italian Alps Vacation Planner
+
+This module groups the distance calculations shared by the recommendation
+engine and the spatial index. The batch helpers use NumPy when it is
+installed and a pure-Python loop otherwise.
+"""
+
+import functools
+import math
+
+# Radius of the Earth in km
+EARTH_RADIUS_KM = 6371.0
+
+# Length of one degree of latitude in km on the same sphere as the distances,
+# so bounding boxes never cut off points within their radius
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+@functools.cache
+def get_numpy():
+    """
+    Import NumPy on first use
+    
+    NumPy is optional: the batch helpers fall back to pure Python without
+    it. It is not imported with this module, which every worker loads
+    through the models, since importing it takes tens of milliseconds.
+    
+    Returns:
+        module: numpy, or None if it is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def calculate_distance(lat1, lng1, lat2, lng2):
+    """
+    Calculate distance between two coordinates using Haversine formula
+    
+    Args:
+        lat1, lng1: Coordinates of point 1
+        lat2, lng2: Coordinates of point 2
+        
+    Returns:
+        float: Distance in kilometers
+    """
+    # Convert degrees to radians
+    lat1_rad = math.radians(lat1)
+    lng1_rad = math.radians(lng1)
+    lat2_rad = math.radians(lat2)
+    lng2_rad = math.radians(lng2)
+    
+    # Differences in coordinates
+    dlat = lat2_rad - lat1_rad
+    dlng = lng2_rad - lng1_rad
+    
+    # Haversine formula
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    distance = EARTH_RADIUS_KM * c
+    
+    return distance
+
+
+def km_per_deg_lng(lat):
+    """
+    Length of one degree of longitude in km at the given latitude
+    
+    The value is clamped so that queries close to the poles never divide by zero.
+    """
+    return KM_PER_DEG_LAT * max(math.cos(math.radians(min(abs(lat), 89.0))), 0.01)
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Compute a lat/lng box that contains every point within a radius
+    
+    Args:
+        lat, lng: Coordinates of the center point
+        radius_km (float): Radius in kilometers
+        
+    Returns:
+        tuple: (min_lat, min_lng, max_lat, max_lng)
+    """
+    dlat = radius_km / KM_PER_DEG_LAT
+    dlng = radius_km / km_per_deg_lng(abs(lat) + dlat)
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """
+    Calculate distances from one point to many points in a single call
+    
+    Args:
+        lat, lng: Coordinates of the origin
+        lats, lngs: Sequences of destination latitudes and longitudes
+        
+    Returns:
+        list: Distance in kilometers to each destination, in input order
+    """
+    if len(lats) == 0:
+        return []
+    
+    np = get_numpy()
+    if np is None:
+        return _haversine_many_python(lat, lng, lats, lngs)
+    
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs_rad = np.radians(np.asarray(lngs, dtype=np.float64))
+    
+    dlat = lats_rad - lat_rad
+    dlng = lngs_rad - math.radians(lng)
+    
+    a = np.sin(dlat / 2)**2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlng / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return (EARTH_RADIUS_KM * c).tolist()
+
+
+def haversine_matrix(lats1, lngs1, lats2, lngs2):
+    """
+    Calculate the distance between every pair of points of two sets
+    
+    Args:
+        lats1, lngs1: Coordinates of the first set (rows)
+        lats2, lngs2: Coordinates of the second set (columns)
+        
+    Returns:
+        list: One list per point of the first set with its distance in
+        kilometers to every point of the second set
+    """
+    if len(lats1) == 0:
+        return []
+    if len(lats2) == 0:
+        return [[] for _ in lats1]
+    
+    np = get_numpy()
+    if np is None:
+        return [_haversine_many_python(lat, lng, lats2, lngs2) for lat, lng in zip(lats1, lngs1)]
+    return _haversine_array(lats1, lngs1, lats2, lngs2).tolist()
+
+
+def nearest_within(lats1, lngs1, lats2, lngs2, radius_km, limit):
+    """
+    Find the nearest points of a second set within a radius of every point of a first set
+    
+    With NumPy the distances stay in one array: the radius is applied as a
+    mask and the nearest points are picked with a partial sort, so only the
+    kept pairs become Python objects.
+    
+    Args:
+        lats1, lngs1: Coordinates of the first set
+        lats2, lngs2: Coordinates of the second set
+        radius_km (float): Maximum distance in kilometers
+        limit (int): Maximum number of points kept per point of the first set
+        
+    Returns:
+        list: One list per point of the first set of (index in the second
+        set, distance in kilometers) tuples, nearest first
+    """
+    if len(lats2) == 0 or limit <= 0:
+        return [[] for _ in lats1]
+    
+    np = get_numpy()
+    if np is None:
+        return [
+            sorted(
+                ((index, distance) for index, distance in enumerate(_haversine_many_python(lat, lng, lats2, lngs2))
+                 if distance <= radius_km),
+                key=lambda x: x[1]
+            )[:limit]
+            for lat, lng in zip(lats1, lngs1)
+        ]
+    
+    nearest = []
+    for distances in _haversine_array(lats1, lngs1, lats2, lngs2):
+        indexes = np.flatnonzero(distances <= radius_km)
+        if len(indexes) > limit:
+            indexes = indexes[np.argpartition(distances[indexes], limit - 1)[:limit]]
+        indexes = indexes[np.argsort(distances[indexes], kind='stable')]
+        nearest.append(list(zip(indexes.tolist(), distances[indexes].tolist())))
+    return nearest
+
+
+def _haversine_array(lats1, lngs1, lats2, lngs2):
+    """NumPy distance matrix between two sets of points, in kilometers"""
+    np = get_numpy()
+    lats1_rad = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lngs1_rad = np.radians(np.asarray(lngs1, dtype=np.float64))[:, np.newaxis]
+    lats2_rad = np.radians(np.asarray(lats2, dtype=np.float64))[np.newaxis, :]
+    lngs2_rad = np.radians(np.asarray(lngs2, dtype=np.float64))[np.newaxis, :]
+    
+    dlat = lats2_rad - lats1_rad
+    dlng = lngs2_rad - lngs1_rad
+    
+    a = np.sin(dlat / 2)**2 + np.cos(lats1_rad) * np.cos(lats2_rad) * np.sin(dlng / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def _haversine_many_python(lat, lng, lats, lngs):
+    """Pure-Python version of haversine_many with the origin terms hoisted out of the loop"""
+    lat_rad = math.radians(lat)
+    lng_rad = math.radians(lng)
+    cos_lat = math.cos(lat_rad)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    
+    distances = []
+    for other_lat, other_lng in zip(lats, lngs):
+        other_lat_rad = radians(other_lat)
+        a = sin((other_lat_rad - lat_rad) / 2)**2 + cos_lat * cos(other_lat_rad) * sin((radians(other_lng) - lng_rad) / 2)**2
+        # 2 * atan2(sqrt(a), sqrt(1 - a)) == 2 * asin(sqrt(a)) for a in [0, 1]
+        distances.append(2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0))))
+    return distances
+
+
+# Decimal places kept by the encoded polyline format (about 1 m)
+POLYLINE_PRECISION = 5
+
+
+def encode_polyline(points, precision=POLYLINE_PRECISION):
+    """
+    Encode [lat, lng] pairs with the Google encoded polyline algorithm
+    
+    Returns:
+        str: The encoded path
+    """
+    factor = 10 ** precision
+    chunks = []
+    prev_lat = prev_lng = 0
+    
+    for lat, lng in points:
+        int_lat = round(lat * factor)
+        int_lng = round(lng * factor)
+        for delta in (int_lat - prev_lat, int_lng - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_lat, prev_lng = int_lat, int_lng
+    
+    return "".join(chunks)
+
+
+def decode_polyline(encoded, precision=POLYLINE_PRECISION):
+    """
+    Decode a Google encoded polyline
+    
+    Returns:
+        list: [lat, lng] pairs
+    """
+    factor = 10 ** precision
+    points = []
+    index = 0
+    lat = lng = 0
+    length = len(encoded)
+    
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append([lat / factor, lng / factor])
+    
+    return points
+
+
+def normalize_path(path):
+    """
+    Convert a trail path to a list of [lat, lng] pairs
+    
+    Paths come as an encoded polyline (how they are stored), as
+    [[lat, lng], ...] (trekking API) or as [{"lat": .., "lng": ..}, ...]
+    (scraped and hand-written trails).
+    """
+    if not path:
+        return []
+    if isinstance(path, str):
+        return decode_polyline(path)
+    return [
+        [point["lat"], point["lng"]] if isinstance(point, dict) else [point[0], point[1]]
+        for point in path
+    ]
+
+
+def path_bounds(points):
+    """Return (min_lat, min_lng, max_lat, max_lng) of a list of [lat, lng] pairs"""
+    lats = [point[0] for point in points]
+    lngs = [point[1] for point in points]
+    return min(lats), min(lngs), max(lats), max(lngs)
+
+
+# Zoom levels for which simplified trail paths are precomputed and stored
+SIMPLIFIED_ZOOM_LEVELS = (6, 8, 10, 12, 14)
+
+
+def tolerance_for_zoom(zoom):
+    """
+    Simplification tolerance in degrees for a web map zoom level
+    
+    Half the size of a screen pixel at that zoom, so dropped vertices are
+    never visible.
+    """
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+
+def simplify_path(points, tolerance):
+    """
+    Simplify a polyline with the Douglas-Peucker algorithm
+    
+    Args:
+        points (list): [lat, lng] pairs
+        tolerance (float): Maximum deviation in degrees of latitude
+        
+    Returns:
+        list: The retained [lat, lng] pairs, always including both ends
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+    
+    # Work in a locally equirectangular plane so longitude is not over-weighted
+    lng_scale = math.cos(math.radians(points[0][0]))
+    xs = [point[1] * lng_scale for point in points]
+    ys = [point[0] for point in points]
+    
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    
+    while stack:
+        start, end = stack.pop()
+        dx = xs[end] - xs[start]
+        dy = ys[end] - ys[start]
+        length = math.hypot(dx, dy)
+        
+        max_distance = 0.0
+        max_index = None
+        for i in range(start + 1, end):
+            if length == 0:
+                distance = math.hypot(xs[i] - xs[start], ys[i] - ys[start])
+            else:
+                distance = abs(dy * (xs[i] - xs[start]) - dx * (ys[i] - ys[start])) / length
+            if distance > max_distance:
+                max_distance = distance
+                max_index = i
+        
+        if max_index is not None and max_distance > tolerance:
+            keep[max_index] = True
+            stack.append((start, max_index))
+            stack.append((max_index, end))
+    
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_for_zoom_levels(path):
+    """
+    Precompute simplified versions of a path for SIMPLIFIED_ZOOM_LEVELS
+    
+    Args:
+        path: Path in any format accepted by normalize_path
+        
+    Returns:
+        dict: Zoom level (as a string, for JSON storage) -> encoded polyline,
+        or None if there is no path
+    """
+    points = normalize_path(path)
+    if not points:
+        return None
+    return {
+        str(zoom): encode_polyline(simplify_path(points, tolerance_for_zoom(zoom)))
+        for zoom in SIMPLIFIED_ZOOM_LEVELS
+    }
+
+
+def path_for_zoom(path, simplified, zoom):
+    """
+    Pick the path to send for a zoom level
+    
+    Uses the coarsest stored simplification that is still at least as
+    detailed as the zoom requires, and falls back to simplifying the full
+    path on the fly when nothing suitable is stored.
+    
+    Args:
+        path (str): Full path as an encoded polyline
+        simplified (dict): Stored simplifications from simplify_for_zoom_levels
+        zoom (int): Requested zoom level, or None for the full path
+        
+    Returns:
+        str: Encoded polyline, or None if there is no path
+    """
+    if not path:
+        return None
+    if zoom is None:
+        return path
+    if simplified:
+        for level in SIMPLIFIED_ZOOM_LEVELS:
+            if level >= zoom and isinstance(simplified.get(str(level)), str):
+                return simplified[str(level)]
+    return encode_polyline(simplify_path(normalize_path(path), tolerance_for_zoom(zoom)))
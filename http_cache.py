@@ -0,0 +1,261 @@
+"""
+HTTP Cache for Italian Alps Vacation Planner
+
+On-disk cache for the web pages downloaded by trail enrichment and the
+family trails scraper. Page bodies are stored content-addressed (by SHA-256,
+so identical pages are stored once) next to a small SQLite index mapping each
+URL to its current body and validators. Cached URLs are revalidated with
+conditional requests (If-None-Match / If-Modified-Since), so an unchanged
+page costs a 304 instead of a download. Text extracted from a body is cached
+by content hash too, so unchanged pages are never parsed twice. The least
+recently used entries are evicted once the cache exceeds its size limit.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", "http_cache")
+DEFAULT_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Connections to the index wait this long for another process's write lock
+INDEX_TIMEOUT = 30
+
+
+class CachedPage:
+    """A page served from the network or the cache"""
+    
+    def __init__(self, url, status_code, content=None, content_hash=None, encoding=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.content_hash = content_hash
+        self.encoding = encoding
+        self.from_cache = from_cache
+    
+    @property
+    def text(self):
+        """The body decoded with the encoding declared by the server"""
+        if self.content is None:
+            return None
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HTTPCache:
+    """
+    Content-addressed page cache with conditional revalidation and LRU eviction
+    
+    Safe to share between threads and processes: the index is SQLite and
+    files are written atomically.
+    """
+    
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._init_lock = threading.Lock()
+        self._initialized = False
+    
+    def _connect(self):
+        with self._init_lock:
+            if not self._initialized:
+                os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+        connection = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=INDEX_TIMEOUT)
+        with self._init_lock:
+            if not self._initialized:
+                connection.executescript(
+                    "CREATE TABLE IF NOT EXISTS pages ("
+                    " url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, encoding TEXT,"
+                    " etag TEXT, last_modified TEXT, size INTEGER NOT NULL,"
+                    " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL);"
+                    "CREATE INDEX IF NOT EXISTS ix_pages_accessed_at ON pages (accessed_at);"
+                    "CREATE INDEX IF NOT EXISTS ix_pages_content_hash ON pages (content_hash);"
+                )
+                self._initialized = True
+        return connection
+    
+    def _object_path(self, content_hash, suffix=""):
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash + suffix)
+    
+    def _read_object(self, content_hash, suffix=""):
+        try:
+            with open(self._object_path(content_hash, suffix), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def _write_object(self, content_hash, data, suffix=""):
+        path = self._object_path(content_hash, suffix)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    
+    def fetch(self, url, session=None, timeout=10, max_age=None):
+        """
+        Get a page, revalidating a cached copy with a conditional request
+        
+        Args:
+            url (str): Page to get
+            session (requests.Session): Session to send the request with
+            timeout (float): Request timeout in seconds
+            max_age (float): Serve a cached copy younger than this many
+                seconds without contacting the server
+        
+        Returns:
+            CachedPage: The page. Responses other than 200 and 304 are
+            returned with their status code and no content, and not cached.
+        
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        connection = self._connect()
+        try:
+            entry = connection.execute(
+                "SELECT content_hash, encoding, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            
+            cached = None
+            if entry:
+                content = self._read_object(entry[0])
+                if content is not None:
+                    cached = CachedPage(url, 200, content, entry[0], entry[1], from_cache=True)
+            
+            if cached and max_age is not None and time.time() - entry[4] < max_age:
+                self._touch(connection, url)
+                return cached
+            
+            headers = {}
+            if cached and entry[2]:
+                headers["If-None-Match"] = entry[2]
+            if cached and entry[3]:
+                headers["If-Modified-Since"] = entry[3]
+            
+            response = (session or requests).get(url, headers=headers, timeout=timeout)
+            
+            if response.status_code == 304 and cached:
+                with connection:
+                    connection.execute(
+                        "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                        (time.time(), time.time(), url)
+                    )
+                return cached
+            
+            if response.status_code != 200:
+                return CachedPage(url, response.status_code)
+            
+            content = response.content
+            content_hash = hashlib.sha256(content).hexdigest()
+            self._write_object(content_hash, content)
+            now = time.time()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO pages "
+                    "(url, content_hash, encoding, etag, last_modified, size, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, content_hash, response.encoding, response.headers.get("ETag"),
+                     response.headers.get("Last-Modified"), len(content), now, now)
+                )
+            if entry and entry[0] != content_hash:
+                self._remove_if_unused(connection, entry[0])
+            self._evict(connection)
+            return CachedPage(url, 200, content, content_hash, response.encoding)
+        finally:
+            connection.close()
+    
+    def _touch(self, connection, url):
+        with connection:
+            connection.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+    
+    def get_text(self, content_hash, name="text"):
+        """
+        Previously stored extracted text of a body
+        
+        Returns:
+            str: The text ("" if the extractor found none), or None if not cached
+        """
+        cached = self._read_object(content_hash, f".{name}")
+        return cached.decode("utf-8") if cached is not None else None
+    
+    def put_text(self, content_hash, text, name="text"):
+        """Store text extracted from a body (None is stored as "found none")"""
+        self._write_object(content_hash, (text or "").encode("utf-8"), f".{name}")
+    
+    def extracted_text(self, page, extract, name="text"):
+        """
+        Text extracted from a page, computed once per distinct body
+        
+        Args:
+            page (CachedPage): A page with content
+            extract (callable): Extracts the text from the page's body
+            name (str): Identifies the extractor, so different extractions
+                of the same body are cached separately
+        
+        Returns:
+            str: The extracted text, or None if the extractor found none
+        """
+        text = self.get_text(page.content_hash, name)
+        if text is None:
+            text = extract(page.content)
+            self.put_text(page.content_hash, text, name)
+        return text or None
+    
+    def _evict(self, connection):
+        """Drop the least recently used pages until the cache fits its size limit"""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        evicted = 0
+        for url, content_hash, size in connection.execute(
+            "SELECT url, content_hash, size FROM pages ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            with connection:
+                connection.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+            
+            self._remove_if_unused(connection, content_hash)
+        
+        logger.info(f"Evicted {evicted} pages from the HTTP cache")
+    
+    def _remove_if_unused(self, connection, content_hash):
+        """Remove a body and its extracted texts once no URL refers to it"""
+        still_used = connection.execute(
+            "SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if still_used:
+            return
+        folder = os.path.dirname(self._object_path(content_hash))
+        try:
+            names = os.listdir(folder)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.startswith(content_hash):
+                try:
+                    os.remove(os.path.join(folder, name))
+                except FileNotFoundError:
+                    pass
+
+
+_cache = None
+
+
+def get_http_cache():
+    """The process-wide HTTP cache"""
+    global _cache
+    if _cache is None:
+        _cache = HTTPCache()
+    return _cache
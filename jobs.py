@@ -0,0 +1,114 @@
+"""
+Background Jobs for Italian Alps Vacation Planner
+
+Long-running work (trekking API syncs, trail enrichment) runs on a small
+thread pool instead of inside the request. Each job is persisted in the
+jobs table, so any worker process can report its status and progress to
+clients polling /api/jobs/<id>.
+"""
+
+import logging
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import Job, db
+
+logger = logging.getLogger(__name__)
+
+# Jobs run concurrently per process
+JOB_WORKERS = 2
+
+# A queued or running job without a progress report for this long is
+# considered lost (e.g. its process was restarted) and reported as failed
+JOB_STALE_AFTER = timedelta(minutes=15)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        return _executor
+
+
+def submit_job(app, kind, func, *args, **kwargs):
+    """
+    Persist a job and run it on the background pool
+    
+    The function is called inside an app context with the given arguments
+    plus a `progress` callback taking (done, total=None, message=None). Its
+    return value must be JSON-serializable and is stored as the job result.
+    
+    Args:
+        app (Flask): Application used to open an app context for the job
+        kind (str): Short name of the kind of work, shown to clients
+        func (callable): Function doing the work
+        
+    Returns:
+        str: ID of the new job
+    """
+    job = Job(id=uuid.uuid4().hex, kind=kind, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    
+    _get_executor().submit(_run_job, app, job.id, func, args, kwargs)
+    logger.info(f"Queued {kind} job {job.id}")
+    return job.id
+
+
+def _update_job(job_id, **values):
+    """Write job fields on their own connection, independent of the job's session"""
+    values['updated_at'] = datetime.utcnow()
+    with db.engine.begin() as connection:
+        connection.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**values))
+
+
+def _run_job(app, job_id, func, args, kwargs):
+    with app.app_context():
+        _update_job(job_id, status='running', started_at=datetime.utcnow())
+        
+        def progress(done, total=None, message=None):
+            values = {'progress': done}
+            if total is not None:
+                values['total'] = total
+            if message is not None:
+                values['message'] = message
+            _update_job(job_id, **values)
+        
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Job {job_id} failed: {str(e)}\n{traceback.format_exc()}")
+            _update_job(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            return
+        finally:
+            db.session.remove()
+        
+        _update_job(job_id, status='succeeded', result=result, finished_at=datetime.utcnow())
+        logger.info(f"Job {job_id} succeeded")
+
+
+def get_job(job_id):
+    """
+    Load a job, marking it failed if it stopped reporting progress
+    
+    Returns:
+        Job: The job, or None if it does not exist
+    """
+    job = db.session.get(Job, job_id)
+    if job and job.status in ('queued', 'running') and job.updated_at \
+            and datetime.utcnow() - job.updated_at > JOB_STALE_AFTER:
+        job.status = 'failed'
+        job.error = "Job stopped reporting progress, its worker was probably restarted"
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return job
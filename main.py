@@ -1,4 +1,14 @@
 from app import app
 
-if __name__ == "__main__":
+
+def run():
+    """Prepare the database and start the development server; in production
+    run bootstrap.py once before starting the workers"""
+    from bootstrap import bootstrap
+    with app.app_context():
+        bootstrap()
     app.run(host="0.0.0.0", port=5000, debug=True)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,87 @@
+"""
+Map data queries for Italian Alps Vacation Planner
+
+This module builds the POI payloads served to the map, either for the whole
+dataset or for the current viewport with trail paths simplified for the
+zoom level. Paths are sent as encoded polylines.
+"""
+
+from sqlalchemy import and_, or_
+
+from geo import path_for_zoom
+from models import POI, Category, db
+
+
+def parse_bbox(value):
+    """
+    Parse a "south,west,north,east" string
+    
+    Returns:
+        tuple: (south, west, north, east) floats
+        
+    Raises:
+        ValueError: If the value is not four numbers with south <= north and west <= east
+    """
+    south, west, north, east = [float(part) for part in value.split(',')]
+    if south > north or west > east:
+        raise ValueError("bbox must be ordered south,west,north,east")
+    return south, west, north, east
+
+
+def build_pois_by_category(bbox=None, zoom=None, categories=None):
+    """
+    Group POIs by category name
+    
+    Args:
+        bbox (tuple, optional): (south, west, north, east) viewport; only POIs
+            or trail paths intersecting it are returned
+        zoom (int, optional): Map zoom level used to pick the stored
+            simplification of trail paths
+        categories (list, optional): Restrict the result to these category names
+        
+    Returns:
+        dict: Category name -> list of serialized POIs
+    """
+    join_condition = POI.category_id == Category.id
+    if bbox:
+        south, west, north, east = bbox
+        join_condition = and_(
+            join_condition,
+            # The point is in the viewport or the stored bounds of the path
+            # overlap it, however far away the trail starts
+            or_(
+                and_(POI.lat.between(south, north), POI.lng.between(west, east)),
+                and_(
+                    POI.path_min_lat <= north, POI.path_max_lat >= south,
+                    POI.path_min_lng <= east, POI.path_max_lng >= west
+                )
+            )
+        )
+    
+    # One query for every category and its POIs, selecting only the serialized columns
+    query = db.session.query(
+        Category.name.label('category_name'),
+        POI.id, POI.name, POI.lat, POI.lng, POI.description, POI.url,
+        POI.path_polyline, POI.path_simplified, POI.difficulty_rating, POI.rating_count
+    ).outerjoin(POI, join_condition)
+    if categories:
+        query = query.filter(Category.name.in_(categories))
+    rows = query.order_by(Category.id, POI.id).all()
+    
+    result = {}
+    for row in rows:
+        pois = result.setdefault(row.category_name, [])
+        # Categories without POIs still appear, with an empty list
+        if row.id is None:
+            continue
+        
+        if bbox is None:
+            pois.append(POI.row_to_dict(row))
+            continue
+        
+        poi = POI.row_to_dict(row)
+        poi['path'] = path_for_zoom(row.path_polyline, row.path_simplified, zoom)
+        pois.append(poi)
+    
+    return result
+
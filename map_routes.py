@@ -0,0 +1,186 @@
+"""
+Map Routes for Italian Alps Vacation Planner
+
+Pages and APIs behind the interactive map: POIs, marker clusters, vector
+tiles and Airbnb listings.
+"""
+
+import logging
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, send_from_directory, url_for
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('map', __name__)
+
+# Modules the views import on first use, loaded up front in preload mode
+PRELOAD_MODULES = ('map_data', 'clustering', 'vector_tiles')
+
+
+@bp.route('/')
+def index():
+    """Render the main map page."""
+    return render_template('index.html')
+
+@bp.route('/airbnbs')
+def airbnb_list():
+    """Render the Airbnb listings page."""
+    from models import Airbnb
+    airbnbs = Airbnb.query.all()
+    return render_template('airbnb_list.html', airbnbs=airbnbs)
+
+@bp.route('/api/pois')
+def get_pois():
+    """Get all POIs, or only those in the viewport when a bbox is given."""
+    from dataset_cache import cached_json_response
+    from map_data import build_pois_by_category, parse_bbox
+    
+    if 'bbox' not in request.args:
+        return cached_json_response('pois', build_pois_by_category)
+    
+    try:
+        bbox = parse_bbox(request.args['bbox'])
+    except ValueError:
+        return jsonify({"error": "bbox must be south,west,north,east"}), 400
+    zoom = request.args.get('zoom', type=int)
+    categories = sorted(name for name in request.args.get('categories', '').split(',') if name)
+    
+    cache_key = f"pois:{request.args['bbox']}:{zoom}:{','.join(categories)}"
+    return cached_json_response(
+        cache_key,
+        lambda: build_pois_by_category(bbox=bbox, zoom=zoom, categories=categories or None)
+    )
+
+@bp.route('/api/pois/clusters')
+def get_poi_clusters():
+    """Get marker clusters for a zoom level, optionally limited to a viewport."""
+    from dataset_cache import cached_json_response
+    from clustering import get_clusters, CLUSTER_MAX_ZOOM
+    from map_data import parse_bbox
+    
+    zoom = request.args.get('zoom', type=int)
+    if zoom is None:
+        return jsonify({"error": "zoom is required"}), 400
+    
+    bbox = None
+    if 'bbox' in request.args:
+        try:
+            bbox = parse_bbox(request.args['bbox'])
+        except ValueError:
+            return jsonify({"error": "bbox must be south,west,north,east"}), 400
+    categories = sorted(name for name in request.args.get('categories', '').split(',') if name)
+    
+    cache_key = f"clusters:{request.args.get('bbox', '')}:{zoom}:{','.join(categories)}"
+    return cached_json_response(cache_key, lambda: {
+        "max_zoom": CLUSTER_MAX_ZOOM,
+        "clusters": get_clusters(zoom, bbox=bbox, categories=categories or None)
+    })
+
+@bp.route('/tiles/<int:z>/<int:x>/<int:y>.mvt')
+def get_vector_tile(z, x, y):
+    """Serve POIs and trail paths as a Mapbox Vector Tile."""
+    from dataset_cache import get_dataset_version
+    from vector_tiles import get_tile, DEFAULT_TILE_CACHE_DIR
+    
+    if not 0 <= z <= 22 or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        return jsonify({"error": "Tile coordinates out of range"}), 404
+    
+    version = get_dataset_version()
+    etag = f"v{version}-{z}-{x}-{y}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        cache_dir = current_app.config.get('TILE_CACHE_DIR', DEFAULT_TILE_CACHE_DIR)
+        response = current_app.response_class(
+            get_tile(z, x, y, version, cache_dir=cache_dir),
+            mimetype='application/vnd.mapbox-vector-tile'
+        )
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/api/airbnbs')
+def get_airbnbs():
+    """Get all Airbnbs from the database."""
+    from models import Airbnb
+    from dataset_cache import cached_json_response
+    return cached_json_response(
+        'airbnbs', lambda: [airbnb.to_dict() for airbnb in Airbnb.query.all()]
+    )
+
+@bp.route('/api/airbnbs/<int:airbnb_id>')
+def get_airbnb(airbnb_id):
+    """Get a specific Airbnb by ID."""
+    from models import Airbnb
+    airbnb = Airbnb.query.get(airbnb_id)
+    if not airbnb:
+        return jsonify({"error": "Airbnb not found"}), 404
+    return jsonify(airbnb.to_dict())
+
+@bp.route('/add-airbnb', methods=['GET', 'POST'])
+def add_airbnb():
+    """Add a new Airbnb to the database."""
+    if request.method == 'POST':
+        from models import Airbnb
+        
+        # Get form data
+        name = request.form.get('name')
+        lat = request.form.get('lat')
+        lng = request.form.get('lng')
+        price = request.form.get('price')
+        description = request.form.get('description')
+        url = request.form.get('url')
+        bedrooms = request.form.get('bedrooms')
+        image_url = request.form.get('image_url')
+        
+        # Validate required fields
+        if not name or not lat or not lng:
+            flash('Name, latitude, and longitude are required fields.', 'error')
+            return redirect(url_for('map.add_airbnb'))
+        
+        try:
+            # Convert numeric fields
+            lat = float(lat)
+            lng = float(lng)
+            price = int(price) if price else None
+            bedrooms = int(bedrooms) if bedrooms else None
+            
+            # Create new Airbnb
+            new_airbnb = Airbnb(
+                name=name,
+                lat=lat,
+                lng=lng,
+                price=price,
+                description=description,
+                url=url,
+                bedrooms=bedrooms,
+                image_url=image_url
+            )
+            
+            # Add to database
+            db.session.add(new_airbnb)
+            db.session.commit()
+            
+            # Precompute the trails near the new listing
+            try:
+                from trail_recommendation import refresh_nearby_trails_for_airbnbs
+                refresh_nearby_trails_for_airbnbs([new_airbnb.id])
+            except Exception as e:
+                logger.error(f"Error precomputing nearby trails: {str(e)}")
+            
+            flash('Airbnb added successfully!', 'success')
+            return redirect(url_for('map.index'))
+        
+        except Exception as e:
+            flash(f'Error adding Airbnb: {str(e)}', 'error')
+            return redirect(url_for('map.add_airbnb'))
+    
+    # GET request - show the form
+    return render_template('add_airbnb.html')
+
+@bp.route('/static/<path:path>')
+def serve_static(path):
+    """Serve static files."""
+    return send_from_directory('static', path)
@@ -0,0 +1,190 @@
+"""
+Schema upgrades for Italian Alps Vacation Planner
+
+db.create_all() only creates missing tables, so indexes and columns added to
+existing tables are applied here. Every step checks the live schema first and
+is safe to run on every bootstrap.
+"""
+
+import logging
+
+from sqlalchemy import inspect, null, text
+
+from app import db
+from geo import normalize_path, simplify_for_zoom_levels
+
+logger = logging.getLogger(__name__)
+
+
+def create_missing_indexes():
+    """Create indexes declared on the models that do not exist in the database yet"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                logger.info(f"Creating index {index.name} on {table.name}")
+                index.create(bind=db.engine)
+
+
+def add_missing_columns():
+    """Add columns declared on the models that do not exist in the database yet"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            logger.info(f"Adding column {table.name}.{column.name}")
+            with db.engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+def migrate_legacy_paths(batch_size=500):
+    """
+    Move JSON paths from the old pois.path column to encoded polylines
+    
+    Each migrated row gets its polyline and simplified paths computed and its
+    legacy JSON emptied, so running this again only touches new legacy rows.
+    """
+    from models import POI
+    
+    pending_ids = [
+        poi_id for (poi_id,) in db.session.query(POI.id).filter(POI.legacy_path.isnot(None)).all()
+    ]
+    
+    migrated = 0
+    for start in range(0, len(pending_ids), batch_size):
+        pois = POI.query.filter(POI.id.in_(pending_ids[start:start + batch_size])).all()
+        for poi in pois:
+            if poi.legacy_path and not poi.path_polyline:
+                poi.path = poi.legacy_path
+                poi.path_simplified = simplify_for_zoom_levels(poi.path_polyline)
+                migrated += 1
+            # Store SQL NULL rather than JSON null so the row is not selected again
+            poi.legacy_path = null()
+        db.session.commit()
+    
+    if migrated:
+        logger.info(f"Migrated {migrated} trail paths to encoded polylines")
+
+
+def backfill_simplified_paths(batch_size=500):
+    """Compute the simplified paths of POIs stored before they were precomputed"""
+    from models import POI
+    
+    pending_ids = [
+        poi_id for (poi_id,) in db.session.query(POI.id).filter(
+            POI.path_polyline.isnot(None),
+            POI.path_simplified.is_(None)
+        ).all()
+    ]
+    
+    for start in range(0, len(pending_ids), batch_size):
+        pois = POI.query.filter(POI.id.in_(pending_ids[start:start + batch_size])).all()
+        for poi in pois:
+            poi.path_simplified = simplify_for_zoom_levels(poi.path_polyline)
+        db.session.commit()
+    
+    if pending_ids:
+        logger.info(f"Backfilled simplified paths for {len(pending_ids)} POIs")
+
+
+def backfill_path_bounds(batch_size=500):
+    """Compute the path bounds of POIs stored before they were precomputed"""
+    from models import POI
+    
+    pending_ids = [
+        poi_id for (poi_id,) in db.session.query(POI.id).filter(
+            POI.path_polyline.isnot(None),
+            POI.path_min_lat.is_(None)
+        ).all()
+    ]
+    
+    for start in range(0, len(pending_ids), batch_size):
+        pois = POI.query.filter(POI.id.in_(pending_ids[start:start + batch_size])).all()
+        for poi in pois:
+            for column, value in POI.path_bounds_values(normalize_path(poi.path_polyline)).items():
+                setattr(poi, column, value)
+        db.session.commit()
+    
+    if pending_ids:
+        logger.info(f"Backfilled path bounds for {len(pending_ids)} POIs")
+
+
+def backfill_rating_sums():
+    """Fill rating_sum for trails rated before it was stored"""
+    with db.engine.begin() as connection:
+        result = connection.execute(text(
+            'UPDATE pois SET rating_sum = ('
+            'SELECT COALESCE(SUM(rating), 0) FROM trail_ratings WHERE trail_ratings.poi_id = pois.id'
+            ') WHERE rating_sum IS NULL'
+        ))
+    if result.rowcount:
+        logger.info(f"Backfilled rating sums for {result.rowcount} POIs")
+
+
+def backfill_rating_histograms():
+    """Fill the per-value rating counters for trails rated before they were stored"""
+    from models import RATING_VALUES
+    
+    counters = ', '.join(
+        f'rating_{value}_count = ('
+        f'SELECT COUNT(*) FROM trail_ratings WHERE trail_ratings.poi_id = pois.id AND rating = {value}'
+        ')'
+        for value in RATING_VALUES
+    )
+    with db.engine.begin() as connection:
+        result = connection.execute(text(
+            f'UPDATE pois SET {counters} WHERE rating_1_count IS NULL'
+        ))
+    if result.rowcount:
+        logger.info(f"Backfilled rating histograms for {result.rowcount} POIs")
+
+
+def deduplicate_trail_ratings():
+    """
+    Remove duplicate ratings of the same trail by the same user
+    
+    Only the most recent row of each (poi_id, user_identifier) pair is kept,
+    so the unique index can be created. Aggregates are reconciled afterwards.
+    """
+    inspector = inspect(db.engine)
+    if 'trail_ratings' not in inspector.get_table_names():
+        return
+    if 'uq_trail_ratings_poi_user' in {index['name'] for index in inspector.get_indexes('trail_ratings')}:
+        return
+    
+    with db.engine.begin() as connection:
+        result = connection.execute(text(
+            'DELETE FROM trail_ratings WHERE user_identifier IS NOT NULL AND id NOT IN ('
+            'SELECT MAX(id) FROM trail_ratings WHERE user_identifier IS NOT NULL '
+            'GROUP BY poi_id, user_identifier'
+            ')'
+        ))
+    
+    if result.rowcount:
+        logger.info(f"Removed {result.rowcount} duplicate trail ratings")
+        from ratings import reconcile_rating_aggregates
+        reconcile_rating_aggregates()
+
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models"""
+    add_missing_columns()
+    deduplicate_trail_ratings()
+    create_missing_indexes()
+    migrate_legacy_paths()
+    backfill_simplified_paths()
+    backfill_path_bounds()
+    backfill_rating_sums()
+    backfill_rating_histograms()
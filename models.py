@@ -1,8 +1,12 @@
 from app import db
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, JSON, DateTime, Index, event, inspect
+from sqlalchemy.orm import relationship, deferred
+from geo import decode_polyline, encode_polyline, normalize_path, path_bounds, simplify_for_zoom_levels
 from datetime import datetime
 
+# Valid trail difficulty ratings
+RATING_VALUES = range(1, 6)
+
 class Category(db.Model):
     """A category of Points of Interest (POI)"""
     __tablename__ = 'categories'
@@ -34,27 +38,94 @@ class POI(db.Model):
     url = Column(String)
     category_id = Column(Integer, ForeignKey('categories.id'), nullable=False)
     category = relationship("Category", back_populates="pois")
-    path = Column(JSON, nullable=True)  # For trail paths
+    path_polyline = Column(Text, nullable=True)  # Trail path as a Google encoded polyline
+    path_simplified = Column(JSON, nullable=True)  # Douglas-Peucker simplified polyline per zoom level
+    legacy_path = deferred(Column('path', JSON, nullable=True))  # Old JSON paths, emptied by the migration
+    # Bounding box of the path, so viewport queries can match trails crossing it in SQL
+    path_min_lat = Column(Float, nullable=True)
+    path_min_lng = Column(Float, nullable=True)
+    path_max_lat = Column(Float, nullable=True)
+    path_max_lng = Column(Float, nullable=True)
     difficulty_rating = Column(Float, default=0)  # Average difficulty rating (1-5)
     rating_count = Column(Integer, default=0)  # Number of ratings submitted
+    rating_sum = Column(Integer, default=0)  # Sum of submitted ratings, for incremental averages
+    # Number of submitted ratings per value, for the rating histogram
+    rating_1_count = Column(Integer, default=0)
+    rating_2_count = Column(Integer, default=0)
+    rating_3_count = Column(Integer, default=0)
+    rating_4_count = Column(Integer, default=0)
+    rating_5_count = Column(Integer, default=0)
+    external_id = Column(String, nullable=True)  # ID of the trail in the external trekking API
+    external_updated_at = Column(DateTime, nullable=True)  # Last change reported by the external API
     trail_ratings = relationship("TrailRating", back_populates="poi", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Serves bounding-box proximity queries within a category
+        Index('ix_pois_category_lat_lng', 'category_id', 'lat', 'lng'),
+        # Serves viewport queries matching trails by the bounds of their path
+        Index('ix_pois_path_bounds', 'path_min_lat', 'path_max_lat', 'path_min_lng', 'path_max_lng'),
+        # Matches delta sync records to the trails imported from them
+        Index('uq_pois_category_external_id', 'category_id', 'external_id', unique=True),
+    )
+    
     def __repr__(self):
         return f"<POI {self.name}>"
     
+    @property
+    def path(self):
+        """Trail path as a list of [lat, lng] pairs"""
+        return decode_polyline(self.path_polyline) if self.path_polyline else None
+    
+    @path.setter
+    def path(self, value):
+        # Accepts an encoded polyline, [[lat, lng], ...] or [{"lat": .., "lng": ..}, ...]
+        points = normalize_path(value)
+        self.path_polyline = encode_polyline(points) if points else None
+    
     def to_dict(self):
+        return POI.row_to_dict(self)
+    
+    @staticmethod
+    def path_bounds_values(points):
+        """Values of the path bounds columns for a list of [lat, lng] pairs (all None without a path)"""
+        bounds = path_bounds(points) if points else (None, None, None, None)
+        return dict(zip(('path_min_lat', 'path_min_lng', 'path_max_lat', 'path_max_lng'), bounds))
+    
+    @staticmethod
+    def histogram_column(rating):
+        """Counter column holding the number of ratings with the given value"""
+        return getattr(POI, f"rating_{rating}_count")
+    
+    def rating_histogram(self):
+        """Number of submitted ratings per value, keyed by the rating as a string"""
+        return {str(rating): getattr(self, f"rating_{rating}_count") or 0 for rating in RATING_VALUES}
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize a POI or a query row exposing the same column names"""
         return {
-            "id": self.id,
-            "name": self.name,
-            "lat": self.lat,
-            "lng": self.lng,
-            "description": self.description,
-            "url": self.url,
-            "path": self.path,
-            "difficulty_rating": self.difficulty_rating,
-            "rating_count": self.rating_count
+            "id": row.id,
+            "name": row.name,
+            "lat": row.lat,
+            "lng": row.lng,
+            "description": row.description,
+            "url": row.url,
+            "path": row.path_polyline,
+            "difficulty_rating": row.difficulty_rating,
+            "rating_count": row.rating_count
         }
 
+@event.listens_for(POI, 'before_insert')
+@event.listens_for(POI, 'before_update')
+def _simplify_poi_path(mapper, connection, target):
+    """Recompute the simplified paths and path bounds whenever a POI's path is set or changed"""
+    path_changed = inspect(target).attrs.path_polyline.history.has_changes()
+    if target.path_simplified is None or path_changed:
+        target.path_simplified = simplify_for_zoom_levels(target.path_polyline)
+    if path_changed or (target.path_polyline and target.path_min_lat is None):
+        for column, value in POI.path_bounds_values(normalize_path(target.path_polyline)).items():
+            setattr(target, column, value)
+
 class TrailRating(db.Model):
     """Trail difficulty rating model"""
     __tablename__ = 'trail_ratings'
@@ -67,6 +138,13 @@ class TrailRating(db.Model):
     user_identifier = Column(String)  # Simple identifier to prevent duplicate ratings
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # One rating per user and trail (a unique index so it can be added to existing tables)
+        Index('uq_trail_ratings_poi_user', 'poi_id', 'user_identifier', unique=True),
+        # Serves keyset pagination of a trail's ratings in (created_at, id) order
+        Index('ix_trail_ratings_poi_created_id', 'poi_id', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f"<TrailRating {self.id} for POI {self.poi_id}>"
     
@@ -107,4 +185,67 @@ class Airbnb(db.Model):
             "url": self.url,
             "bedrooms": self.bedrooms,
             "image_url": self.image_url
-        }
\ No newline at end of file
+        }
+
+class AirbnbNearbyTrail(db.Model):
+    """Precomputed nearest trails for an Airbnb listing"""
+    __tablename__ = 'airbnb_nearby_trails'
+    
+    id = Column(Integer, primary_key=True)
+    airbnb_id = Column(Integer, ForeignKey('airbnbs.id', ondelete='CASCADE'), nullable=False)
+    poi_id = Column(Integer, ForeignKey('pois.id', ondelete='CASCADE'), nullable=False)
+    distance_km = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        Index('ix_airbnb_nearby_trails_airbnb_distance', 'airbnb_id', 'distance_km'),
+    )
+    
+    def __repr__(self):
+        return f"<AirbnbNearbyTrail {self.airbnb_id} -> {self.poi_id}>"
+
+
+class DatasetVersion(db.Model):
+    """Counter bumped on every write to the map data, used for HTTP caching"""
+    __tablename__ = 'dataset_versions'
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DatasetVersion {self.name}={self.version}>"
+
+
+class Job(db.Model):
+    """A background job (API sync, enrichment) and its progress"""
+    __tablename__ = 'jobs'
+    
+    id = Column(String, primary_key=True)  # UUID, handed to clients for polling
+    kind = Column(String, nullable=False)  # e.g. trail_sync, enrich_trails
+    status = Column(String, nullable=False, default='queued')  # queued, running, succeeded, failed
+    progress = Column(Integer, nullable=False, default=0)  # Items processed so far
+    total = Column(Integer, nullable=True)  # Items to process, if known
+    message = Column(String, nullable=True)  # Latest progress message
+    result = Column(JSON, nullable=True)  # Return value of a succeeded job
+    error = Column(Text, nullable=True)  # Error of a failed job
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Heartbeat, refreshed on every progress report
+    
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "total": self.total,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,68 @@
+"""
+Page parsing pipeline for Italian Alps Vacation Planner
+
+Downloads pages in threads and parses them in spawned worker processes.
+This module imports neither the app nor the models, and the parse functions
+run in the workers live in text_extraction, which doesn't either, so a
+worker only loads the parsing code it needs.
+"""
+
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+def fetch_and_parse(items, fetch, parse_task, fetch_workers, parse_processes, thread_name_prefix):
+    """
+    Download pages in threads and parse each in a worker process as soon as it arrives
+    
+    Worker processes are spawned rather than forked, since the parent runs
+    threads, and only started once a page needs parsing.
+    
+    Args:
+        items (list): Work items, one page each
+        fetch (callable): fetch(item) returning the downloaded page or None,
+            run in one of `fetch_workers` threads
+        parse_task (callable): parse_task(item, page) returning the
+            (function, args) to run in a worker process, or None if the page
+            needs no parsing (e.g. its result is cached)
+        fetch_workers (int): Pages downloaded in parallel
+        parse_processes (int): Maximum number of worker processes
+        thread_name_prefix (str): Name prefix of the download threads
+    
+    Yields:
+        tuple: (item, page, parsed) for every item as it completes: page is
+        None if the download failed, parsed is the finished Future of the
+        worker process or None if no parsing was needed
+    """
+    parse_pool = None
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix=thread_name_prefix) as fetch_pool:
+            fetches = {fetch_pool.submit(fetch, item): item for item in items}
+            parses = {}
+            
+            # Hand each downloaded page to the parsing pool as soon as it arrives
+            while fetches or parses:
+                finished, _ = wait(list(fetches) + list(parses), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in parses:
+                        item, page = parses.pop(future)
+                        yield item, page, future
+                        continue
+                    
+                    item = fetches.pop(future)
+                    page = future.result()
+                    task = parse_task(item, page) if page else None
+                    if task is None:
+                        yield item, page, None
+                        continue
+                    
+                    if parse_pool is None:
+                        parse_pool = ProcessPoolExecutor(
+                            max_workers=min(parse_processes, len(items)),
+                            mp_context=multiprocessing.get_context("spawn")
+                        )
+                    function, args = task
+                    parses[parse_pool.submit(function, *args)] = (item, page)
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
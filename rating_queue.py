@@ -0,0 +1,254 @@
+"""
+Buffered rating ingestion for Italian Alps Vacation Planner
+
+When RATING_INGEST_MODE is set to "buffered", rate_trail appends ratings to
+an in-process queue and returns immediately. A background thread flushes the
+queue in batches: the ratings of a batch are upserted in one statement and
+the aggregates of each affected trail are recomputed once. If a batch fails,
+its ratings are written one by one so only the failing ones are retried.
+A rating never replaces a more recent one of the same user and trail, so
+retried ratings cannot overwrite newer values. Pending ratings are flushed
+when the process exits.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import POI, RATING_VALUES, TrailRating, db
+from ratings import average_rating
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the app config
+DEFAULT_FLUSH_INTERVAL = 1.0  # RATING_FLUSH_INTERVAL, seconds between flushes
+DEFAULT_BATCH_SIZE = 500  # RATING_BATCH_SIZE, ratings written per transaction
+
+# A rating that fails to be written this many times is dropped (and logged) instead of retried
+MAX_FLUSH_ATTEMPTS = 3
+
+_pending = queue.Queue()
+_worker_lock = threading.Lock()
+_worker = None
+_stopping = threading.Event()
+
+
+def is_buffered(app):
+    """Whether ratings should go through the write-behind queue"""
+    return app.config.get("RATING_INGEST_MODE", "direct") == "buffered"
+
+
+def enqueue_rating(app, poi_id, rating, comment, user_identifier):
+    """
+    Queue a rating to be written by the background worker
+    
+    Args:
+        app (Flask): Application used to open an app context in the worker
+        poi_id (int): ID of the rated trail
+        rating (int): Difficulty rating (1-5)
+        comment (str): Optional comment
+        user_identifier (str): Identifies the rating user
+    """
+    _ensure_worker(app)
+    _pending.put({
+        "poi_id": poi_id,
+        "rating": rating,
+        "comment": comment,
+        "user_identifier": user_identifier,
+        "created_at": datetime.utcnow(),
+        "attempts": 0
+    })
+
+
+def _ensure_worker(app):
+    """Start the flush thread on first use"""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_run_worker, args=(app,), name="rating-flush", daemon=True)
+        _worker.start()
+        atexit.register(_flush_on_exit, app)
+
+
+def _run_worker(app):
+    """Collect queued ratings and flush them every interval or when a batch is full"""
+    interval = app.config.get("RATING_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+    batch_size = app.config.get("RATING_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    
+    while not _stopping.is_set():
+        batch = _take_batch(batch_size, timeout=interval)
+        if batch:
+            with app.app_context():
+                _flush(batch)
+
+
+def _take_batch(batch_size, timeout=None):
+    """Wait up to `timeout` for a first rating, then drain up to a full batch"""
+    batch = []
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while len(batch) < batch_size:
+        try:
+            if not batch and deadline is not None:
+                item = _pending.get(timeout=max(deadline - time.monotonic(), 0))
+            else:
+                item = _pending.get_nowait()
+        except queue.Empty:
+            break
+        batch.append(item)
+    return batch
+
+
+def flush_pending_ratings(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Write every queued rating now (requires an app context)
+    
+    Returns:
+        int: Number of ratings flushed
+    """
+    flushed = 0
+    while True:
+        batch = _take_batch(batch_size)
+        if not batch:
+            return flushed
+        _flush(batch)
+        flushed += len(batch)
+
+
+def _flush_on_exit(app):
+    """Stop the worker and write whatever is still queued"""
+    _stopping.set()
+    if _worker is not None:
+        _worker.join(timeout=5)
+    with app.app_context():
+        flushed = flush_pending_ratings()
+    if flushed:
+        logger.info(f"Flushed {flushed} queued ratings on shutdown")
+
+
+def _flush(batch):
+    """Write a batch of ratings and recompute the aggregates of the affected trails"""
+    # Later ratings by the same user replace earlier ones (a retried rating
+    # can be queued behind a newer one)
+    latest = {}
+    for item in batch:
+        key = (item["poi_id"], item["user_identifier"])
+        if key not in latest or item["created_at"] >= latest[key]["created_at"]:
+            latest[key] = item
+    items = list(latest.values())
+    rows = [_rating_row(item) for item in items]
+    trail_ids = sorted({row["poi_id"] for row in rows})
+    
+    try:
+        _upsert_ratings(rows)
+        _recompute_aggregates(trail_ids)
+        db.session.commit()
+        logger.info(f"Flushed {len(rows)} ratings for {len(trail_ids)} trails")
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Error flushing {len(rows)} ratings, writing them one by one: {str(e)}")
+        _flush_one_by_one(items)
+
+
+def _flush_one_by_one(items):
+    """Write ratings in one transaction each, requeueing those that fail"""
+    failed = 0
+    requeued = 0
+    for item in items:
+        try:
+            _upsert_ratings([_rating_row(item)])
+            _recompute_aggregates([item["poi_id"]])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            failed += 1
+            item["attempts"] += 1
+            if item["attempts"] < MAX_FLUSH_ATTEMPTS:
+                _pending.put(item)
+                requeued += 1
+            else:
+                logger.error(f"Dropping rating of trail {item['poi_id']} after {item['attempts']} attempts: {str(e)}")
+    if failed:
+        logger.error(f"Error writing {failed} of {len(items)} ratings ({requeued} requeued)")
+
+
+def _rating_row(item):
+    """trail_ratings row of a queued rating"""
+    return {key: item[key] for key in ("poi_id", "rating", "comment", "user_identifier", "created_at")}
+
+
+def _upsert_ratings(rows):
+    """Insert the ratings, replacing an older rating of the same user and trail"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        statement = insert(TrailRating.__table__)
+        created_at = TrailRating.__table__.c.created_at
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["poi_id", "user_identifier"],
+                set_={
+                    "rating": statement.excluded.rating,
+                    "comment": statement.excluded.comment,
+                    "created_at": statement.excluded.created_at
+                },
+                where=or_(created_at.is_(None), statement.excluded.created_at >= created_at)
+            ),
+            rows
+        )
+        return
+    
+    # Other databases: merge against the existing rows of the batch's trails
+    existing = {
+        (rating.poi_id, rating.user_identifier): rating
+        for rating in TrailRating.query.filter(
+            TrailRating.poi_id.in_({row["poi_id"] for row in rows})
+        ).all()
+    }
+    new_rows = []
+    for row in rows:
+        current = existing.get((row["poi_id"], row["user_identifier"]))
+        if current:
+            if current.created_at is None or row["created_at"] >= current.created_at:
+                current.rating = row["rating"]
+                current.comment = row["comment"]
+                current.created_at = row["created_at"]
+        else:
+            new_rows.append(row)
+    db.session.bulk_insert_mappings(TrailRating, new_rows)
+
+
+def _recompute_aggregates(trail_ids):
+    """Recompute the rating aggregates and histograms of the given trails in one UPDATE"""
+    rating_sum = select(func.sum(TrailRating.rating)).where(
+        TrailRating.poi_id == POI.id
+    ).scalar_subquery()
+    rating_count = select(func.count(TrailRating.id)).where(
+        TrailRating.poi_id == POI.id
+    ).scalar_subquery()
+    
+    histogram = {
+        f"rating_{value}_count": select(func.count(TrailRating.id)).where(
+            TrailRating.poi_id == POI.id, TrailRating.rating == value
+        ).scalar_subquery()
+        for value in RATING_VALUES
+    }
+    
+    db.session.execute(
+        update(POI)
+        .where(POI.id.in_(trail_ids))
+        .values(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            difficulty_rating=average_rating(rating_sum, rating_count),
+            **histogram
+        )
+        .execution_options(synchronize_session=False)
+    )
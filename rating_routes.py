@@ -0,0 +1,144 @@
+"""
+Rating Routes for Italian Alps Vacation Planner
+
+Trail difficulty ratings: the rating page, submitting a rating and paging
+through a trail's ratings.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, render_template, request
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('ratings', __name__)
+
+# Modules the views import on first use, loaded up front in preload mode
+PRELOAD_MODULES = ('ratings', 'rating_queue')
+
+# Page sizes of the trail ratings API
+RATINGS_PAGE_SIZE = 50
+MAX_RATINGS_PAGE_SIZE = 200
+
+
+@bp.route('/api/trails/<int:trail_id>/ratings', methods=['GET'])
+def get_trail_ratings(trail_id):
+    """
+    Get the ratings of a specific trail, one page at a time.
+    
+    Ratings are returned in (created_at, id) order. Pass the "next_cursor" of
+    a response as ?after= to get the following page. With ?summary=1 only the
+    rating histogram is returned, read from the trail's counters.
+    """
+    from models import TrailRating, POI, Category
+    
+    # Verify that the POI exists and is a trail
+    poi = POI.query.join(Category).filter(POI.id == trail_id, Category.name == 'trails').first()
+    if not poi:
+        return jsonify({"error": "Trail not found"}), 404
+    
+    if request.args.get('summary', '').lower() in ('1', 'true', 'yes'):
+        return jsonify({
+            "trail": poi.to_dict(),
+            "summary": {
+                "rating_count": poi.rating_count,
+                "difficulty_rating": poi.difficulty_rating,
+                "histogram": poi.rating_histogram()
+            }
+        })
+    
+    try:
+        limit = min(max(int(request.args.get('limit', RATINGS_PAGE_SIZE)), 1), MAX_RATINGS_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    
+    query = TrailRating.query.filter(TrailRating.poi_id == trail_id)
+    
+    # Keyset pagination: continue after the (created_at, id) of the last rating seen
+    after = request.args.get('after')
+    if after:
+        try:
+            created_at, rating_id = after.rsplit(',', 1)
+            created_at = datetime.fromisoformat(created_at)
+            rating_id = int(rating_id)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor, expected after=<created_at>,<id>"}), 400
+        query = query.filter(
+            (TrailRating.created_at > created_at) |
+            ((TrailRating.created_at == created_at) & (TrailRating.id > rating_id))
+        )
+    
+    # Fetch one extra row to know whether another page follows
+    ratings = query.order_by(TrailRating.created_at, TrailRating.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(ratings) > limit:
+        ratings = ratings[:limit]
+        last = ratings[-1]
+        next_cursor = f"{last.created_at.isoformat()},{last.id}"
+    
+    return jsonify({
+        "trail": poi.to_dict(),
+        "ratings": [rating.to_dict() for rating in ratings],
+        "next_cursor": next_cursor
+    })
+
+@bp.route('/api/trails/<int:trail_id>/rate', methods=['POST'])
+def rate_trail(trail_id):
+    """Rate a trail's difficulty."""
+    from models import POI, Category
+    
+    # Verify that the POI exists and is a trail
+    poi = POI.query.join(Category).filter(POI.id == trail_id, Category.name == 'trails').first()
+    if not poi:
+        return jsonify({"error": "Trail not found"}), 404
+    
+    # Get the rating data
+    data = request.json
+    rating = data.get('rating')
+    comment = data.get('comment', '')
+    
+    # Generate a unique user identifier or use the one provided
+    user_identifier = data.get('user_identifier', str(uuid.uuid4()))
+    
+    # Validate the rating
+    try:
+        rating = int(rating)
+        if not 1 <= rating <= 5:
+            return jsonify({"error": "Rating must be between 1 and 5"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid rating value"}), 400
+    
+    # In buffered mode the rating is written later by the background worker
+    from rating_queue import is_buffered, enqueue_rating
+    if is_buffered(current_app):
+        enqueue_rating(current_app._get_current_object(), poi.id, rating, comment, user_identifier)
+        return jsonify({
+            "success": True,
+            "queued": True,
+            "trail": poi.to_dict(),
+            "user_identifier": user_identifier
+        }), 202
+    
+    # Record the rating and update the trail's aggregates incrementally
+    from ratings import apply_rating
+    apply_rating(poi.id, rating, comment, user_identifier)
+    
+    # Commit changes
+    db.session.commit()
+    
+    return jsonify({
+        "success": True,
+        "trail": poi.to_dict(),
+        "user_identifier": user_identifier
+    })
+
+@bp.route('/rate-trail/<int:trail_id>', methods=['GET'])
+def rate_trail_page(trail_id):
+    """Show the trail rating page."""
+    from models import POI
+    poi = POI.query.get_or_404(trail_id)
+    return render_template('rate_trail.html', trail=poi)
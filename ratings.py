@@ -0,0 +1,220 @@
+"""
+Trail Ratings for Italian Alps Vacation Planner
+
+This module records difficulty ratings and keeps the aggregates stored on
+each trail (rating_sum, rating_count, difficulty_rating) up to date
+incrementally, so a submission costs the same no matter how many ratings the
+trail already has. A reconciliation job checks the aggregates against the
+trail_ratings table; run it periodically (e.g. from cron) with
+
+    python ratings.py
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import Float, Numeric, case, cast, func, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from models import POI, RATING_VALUES, TrailRating, db
+
+logger = logging.getLogger(__name__)
+
+# How often a rating write is retried when a concurrent request changed it first
+MAX_RATING_ATTEMPTS = 5
+
+
+def average_rating(rating_sum, rating_count):
+    """
+    SQL expression for the difficulty_rating of a rating sum and count
+    
+    Every writer and the reconciliation use this, so the average is always
+    rounded by the database the same way (half away from zero on SQLite and
+    PostgreSQL, unlike Python's round()).
+    """
+    return cast(func.round(cast(rating_sum, Numeric) / rating_count, 1), Float)
+
+
+def apply_rating(poi_id, rating, comment, user_identifier):
+    """
+    Record a user's rating of a trail and update the trail's aggregates
+    
+    Safe under concurrent submissions: the trail row is locked where the
+    database supports it, the rating row is upserted against the unique
+    (poi_id, user_identifier) constraint, a changed rating is only applied
+    if it still holds the value the delta was computed from, and the
+    aggregates are updated with SQL-side arithmetic. A second rating from the
+    same user replaces the first one. The caller commits.
+    
+    Args:
+        poi_id (int): ID of the rated trail
+        rating (int): Difficulty rating (1-5)
+        comment (str): Optional comment
+        user_identifier (str): Identifies the rating user
+    """
+    # Serialize rating writes per trail (SELECT ... FOR UPDATE, a no-op on SQLite)
+    db.session.query(POI.id).filter(POI.id == poi_id).with_for_update().one()
+    
+    for _ in range(MAX_RATING_ATTEMPTS):
+        existing = db.session.query(TrailRating.id, TrailRating.rating).filter_by(
+            poi_id=poi_id,
+            user_identifier=user_identifier
+        ).first()
+        
+        if existing is None:
+            if _insert_rating_if_absent(poi_id, rating, comment, user_identifier):
+                _update_aggregates(poi_id, sum_delta=rating, count_delta=1, histogram_delta={rating: 1})
+                return
+            # Another request inserted this user's rating first, update it instead
+            continue
+        
+        # Only overwrite the value the delta is computed from
+        result = db.session.execute(
+            update(TrailRating)
+            .where(TrailRating.id == existing.id, TrailRating.rating == existing.rating)
+            .values(rating=rating, comment=comment)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            histogram_delta = {existing.rating: -1, rating: 1} if rating != existing.rating else {}
+            _update_aggregates(poi_id, sum_delta=rating - existing.rating, count_delta=0,
+                               histogram_delta=histogram_delta)
+            return
+    
+    raise RuntimeError(f"Could not record rating for trail {poi_id} after {MAX_RATING_ATTEMPTS} attempts")
+
+
+def _insert_rating_if_absent(poi_id, rating, comment, user_identifier):
+    """
+    Insert a rating unless the user already rated the trail
+    
+    Returns:
+        bool: Whether a row was inserted
+    """
+    values = {
+        'poi_id': poi_id,
+        'rating': rating,
+        'comment': comment,
+        'user_identifier': user_identifier,
+        'created_at': datetime.utcnow()
+    }
+    
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        result = db.session.execute(
+            insert(TrailRating.__table__).values(**values)
+            .on_conflict_do_nothing(index_elements=['poi_id', 'user_identifier'])
+        )
+        return result.rowcount == 1
+    
+    # Other databases: rely on the unique constraint inside a savepoint
+    try:
+        with db.session.begin_nested():
+            db.session.execute(TrailRating.__table__.insert().values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _update_aggregates(poi_id, sum_delta, count_delta, histogram_delta):
+    """Apply a rating change to a trail's aggregates and histogram counters in a single UPDATE"""
+    rating_sum = func.coalesce(POI.rating_sum, 0)
+    # Until a trail has local ratings, counts seeded by imports are replaced, not added to
+    rating_count = case((rating_sum == 0, 0), else_=func.coalesce(POI.rating_count, 0))
+    new_sum = rating_sum + sum_delta
+    new_count = rating_count + count_delta
+    histogram = {
+        f"rating_{value}_count": func.coalesce(POI.histogram_column(value), 0) + delta
+        for value, delta in histogram_delta.items()
+    }
+    
+    db.session.execute(
+        update(POI)
+        .where(POI.id == poi_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            difficulty_rating=average_rating(new_sum, new_count),
+            **histogram
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_rating_aggregates(fix=True):
+    """
+    Verify the stored rating aggregates against the trail_ratings table
+    
+    Trails without any rating rows keep their seeded rating_count and
+    difficulty_rating, but must have a zero rating_sum and empty histogram
+    counters.
+    
+    Args:
+        fix (bool): Whether to correct the mismatches found
+        
+    Returns:
+        dict: Number of trails checked and of mismatches found
+    """
+    histogram_columns = [f"rating_{value}_count" for value in RATING_VALUES]
+    
+    # Count the rating rows per trail and value in one pass
+    actual = {}
+    for poi_id, value, count in db.session.query(
+        TrailRating.poi_id, TrailRating.rating, func.count(TrailRating.id)
+    ).group_by(TrailRating.poi_id, TrailRating.rating).all():
+        counts = actual.setdefault(poi_id, dict.fromkeys(histogram_columns, 0))
+        counts[f"rating_{value}_count"] = count
+    
+    # Expected averages, rounded by the same SQL expression the writers use
+    averages = dict(db.session.query(
+        TrailRating.poi_id, average_rating(func.sum(TrailRating.rating), func.count(TrailRating.id))
+    ).group_by(TrailRating.poi_id).all())
+    
+    has_local_ratings = POI.rating_sum != 0
+    for value in RATING_VALUES:
+        has_local_ratings |= POI.histogram_column(value) != 0
+    stored = db.session.query(
+        POI.id, POI.rating_sum, POI.rating_count, POI.difficulty_rating,
+        *[POI.histogram_column(value) for value in RATING_VALUES]
+    ).filter(POI.id.in_(list(actual.keys())) | has_local_ratings).all()
+    
+    mismatches = 0
+    for row in stored:
+        if row.id in actual:
+            histogram = actual[row.id]
+            expected_sum = sum(value * histogram[f"rating_{value}_count"] for value in RATING_VALUES)
+            expected_count = sum(histogram.values())
+            expected = {
+                'rating_sum': expected_sum,
+                'rating_count': expected_count,
+                'difficulty_rating': averages[row.id],
+                **histogram
+            }
+        else:
+            expected = {'rating_sum': 0, **dict.fromkeys(histogram_columns, 0)}
+        
+        current = row._asdict()
+        differences = {key: value for key, value in expected.items() if current[key] != value}
+        if not differences:
+            continue
+        
+        mismatches += 1
+        logger.warning(f"Rating aggregates of trail {row.id} are out of sync: stored {current}, expected {expected}")
+        if fix:
+            POI.query.filter_by(id=row.id).update(differences, synchronize_session=False)
+    
+    if fix and mismatches:
+        db.session.commit()
+    
+    logger.info(f"Checked rating aggregates of {len(stored)} trails, {mismatches} mismatched")
+    return {"checked": len(stored), "mismatched": mismatches}
+
+if __name__ == "__main__":
+    # When run as a script, reconcile the aggregates of every trail
+    from app import app
+    with app.app_context():
+        result = reconcile_rating_aggregates()
+        print(f"Checked {result['checked']} trails, fixed {result['mismatched']}")
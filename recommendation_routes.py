@@ -0,0 +1,168 @@
+"""
+Recommendation Routes for Italian Alps Vacation Planner
+
+Trail recommendations by difficulty, popularity, family-friendliness and
+distance from an Airbnb.
+"""
+
+import logging
+
+from flask import Blueprint, jsonify, render_template, request
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('recommendations', __name__)
+
+# Modules the views import on first use, loaded up front in preload mode
+PRELOAD_MODULES = ('trail_recommendation',)
+
+
+@bp.route('/recommend-trails')
+def recommend_trails_page():
+    """Show the trail recommendation page."""
+    from models import Airbnb
+    airbnbs = Airbnb.query.all()
+    return render_template('recommend_trails.html', airbnbs=airbnbs)
+
+# Trail recommendation endpoints
+@bp.route('/api/recommend/trails', methods=['POST'])
+def recommend_trails_api():
+    """Recommend trails based on user preferences."""
+    try:
+        user_preferences = request.json
+        # Validate input
+        if not user_preferences:
+            return jsonify({"error": "Invalid request, preferences required"}), 400
+        
+        # Import the recommendation engine
+        from trail_recommendation import recommend_trails
+        
+        # Get recommendations
+        recommendations = recommend_trails(user_preferences)
+        
+        # Format the response
+        response = {
+            "recommendations": {
+                "by_difficulty": [t.to_dict() for t in recommendations.get('by_difficulty', [])],
+                "popular_trails": [t.to_dict() for t in recommendations.get('popular_trails', [])]
+            }
+        }
+        
+        # Add family-friendly trails if requested
+        if 'family_friendly' in recommendations:
+            response["recommendations"]["family_friendly"] = [
+                t.to_dict() for t in recommendations.get('family_friendly', [])
+            ]
+        
+        # Add nearby trails if an Airbnb was specified
+        if 'nearby_trails' in recommendations:
+            response["recommendations"]["nearby_trails"] = [
+                {
+                    "trail": item['trail'].to_dict(),
+                    "distance_km": round(item['distance'], 1)
+                }
+                for item in recommendations.get('nearby_trails', [])
+            ]
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Error generating trail recommendations: {str(e)}")
+        return jsonify({"error": "Failed to generate recommendations"}), 500
+
+@bp.route('/api/trails/difficulty/<int:difficulty>', methods=['GET'])
+def get_trails_by_difficulty(difficulty):
+    """Get trails filtered by difficulty level."""
+    try:
+        # Validate difficulty level
+        if difficulty < 1 or difficulty > 5:
+            return jsonify({"error": "Difficulty must be between 1 and 5"}), 400
+        
+        # Import the function
+        from trail_recommendation import get_trails_with_ratings
+        
+        # Get trails
+        trails = get_trails_with_ratings(difficulty_level=difficulty)
+        
+        # Format the response
+        response = {
+            "trails": [t.to_dict() for t in trails]
+        }
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Error getting trails by difficulty: {str(e)}")
+        return jsonify({"error": "Failed to get trails"}), 500
+
+@bp.route('/api/trails/family-friendly', methods=['GET'])
+def get_family_trails_api():
+    """Get family-friendly trails."""
+    try:
+        # Import the function
+        from trail_recommendation import get_family_friendly_trails
+        
+        # Get trails
+        trails = get_family_friendly_trails()
+        
+        # Format the response
+        response = {
+            "trails": [t.to_dict() for t in trails]
+        }
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Error getting family-friendly trails: {str(e)}")
+        return jsonify({"error": "Failed to get family-friendly trails"}), 500
+
+@bp.route('/api/trails/near-airbnb/<int:airbnb_id>', methods=['GET'])
+def get_trails_near_airbnb_api(airbnb_id):
+    """Get trails near a specific Airbnb."""
+    try:
+        # Get optional parameters
+        max_distance = request.args.get('max_distance', default=10, type=float)
+        
+        # Import the function
+        from trail_recommendation import get_trails_near_airbnb
+        
+        # Get trails
+        nearby_trails = get_trails_near_airbnb(airbnb_id, max_distance=max_distance)
+        
+        # Format the response
+        response = {
+            "trails": [
+                {
+                    "trail": item['trail'].to_dict(),
+                    "distance_km": round(item['distance'], 1)
+                }
+                for item in nearby_trails
+            ]
+        }
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Error getting trails near Airbnb: {str(e)}")
+        return jsonify({"error": "Failed to get nearby trails"}), 500
+
+@bp.route('/api/trails/popular', methods=['GET'])
+def get_popular_trails_api():
+    """Get the most popular trails."""
+    try:
+        # Import the function
+        from trail_recommendation import get_popular_trails
+        
+        # Get trails
+        trails = get_popular_trails()
+        
+        # Format the response
+        response = {
+            "trails": [t.to_dict() for t in trails]
+        }
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Error getting popular trails: {str(e)}")
+        return jsonify({"error": "Failed to get popular trails"}), 500
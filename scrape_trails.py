@@ -1,13 +1,12 @@
 import trafilatura
 import re
 import json
-from app import app, db
-from models import POI, Category
+from app import app
+from trail_import import import_trails
 import logging
 import math
 import random
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def scrape_wikiloc_trails():
@@ -121,38 +120,13 @@ def create_approximate_path(center_coordinates):
 def add_scraped_trails_to_database():
     """Add scraped trails to the database"""
     with app.app_context():
-        # Get the trails category
-        trails_category = Category.query.filter_by(name='trails').first()
-        if not trails_category:
-            logger.error("Trails category not found!")
-            return
-        
         # Get trails data
         trails_data = scrape_wikiloc_trails()
         
-        # Add trails to database
-        for trail_data in trails_data:
-            # Check if trail already exists (by name)
-            existing_trail = POI.query.filter_by(name=trail_data["name"]).first()
-            if existing_trail:
-                logger.info(f"Trail already exists: {trail_data['name']}")
-                continue
-                
-            trail = POI(
-                name=trail_data["name"],
-                lat=trail_data["lat"],
-                lng=trail_data["lng"],
-                description=trail_data["description"],
-                url=trail_data["url"],
-                category_id=trails_category.id,
-                path=trail_data["path"]
-            )
-            db.session.add(trail)
-            logger.info(f"Added trail: {trail_data['name']}")
-        
-        # Commit changes
-        db.session.commit()
-        logger.info("Finished adding scraped trails to database")
+        # Insert the trails whose name is new, in batches
+        result = import_trails(trails_data, category_name='trails')
+        logger.info(f"Finished adding scraped trails to database: "
+                    f"{result['inserted']} added, {result['skipped']} already present")
 
 
 if __name__ == "__main__":
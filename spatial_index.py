@@ -0,0 +1,317 @@
+"""
+Spatial Index for Italian Alps Vacation Planner
+
+This module keeps an in-process grid index over POI coordinates so that
+radius and nearest-neighbour lookups only visit the grid cells around the
+query point instead of scanning every POI of a category.
+"""
+
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from flask import current_app
+
+from geo import bounding_box, haversine_many, km_per_deg_lng
+from models import POI, db
+
+logger = logging.getLogger(__name__)
+
+# Size of a grid cell in degrees (roughly 11 km of latitude)
+CELL_SIZE_DEG = 0.1
+
+# Reload the index from the database after this many seconds so that writes
+# made by other worker processes are eventually picked up
+MAX_INDEX_AGE_SECONDS = 300
+
+# Key used to stash pending index changes on a session until it commits
+_PENDING_KEY = "spatial_index_pending"
+
+
+def _cell_for(lat, lng):
+    """Return the (row, column) grid cell containing a coordinate"""
+    return int(math.floor(lat / CELL_SIZE_DEG)), int(math.floor(lng / CELL_SIZE_DEG))
+
+
+class SpatialIndex:
+    """
+    Grid index of POI coordinates, bucketed per category
+    
+    Each POI is stored once in the cell that contains it. Radius queries only
+    visit the cells overlapping the query's bounding box, and k-nearest
+    queries walk rings of cells outwards until no unvisited cell can hold a
+    closer POI.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cells = {}  # (category_id, row, col) -> {poi_id: (lat, lng)}
+        self._positions = {}  # poi_id -> (category_id, row, col)
+        self._category_sizes = {}  # category_id -> number of indexed POIs
+        self._loaded_at = None
+    
+    def is_stale(self):
+        """Whether the index has never been loaded or is older than the max age"""
+        return self._loaded_at is None or time.time() - self._loaded_at > MAX_INDEX_AGE_SECONDS
+    
+    def load(self):
+        """(Re)build the index from the coordinates stored in the database"""
+        rows = db.session.query(POI.id, POI.category_id, POI.lat, POI.lng).all()
+        with self._lock:
+            self._cells = {}
+            self._positions = {}
+            self._category_sizes = {}
+            for poi_id, category_id, lat, lng in rows:
+                self._insert(poi_id, category_id, lat, lng)
+            self._loaded_at = time.time()
+        logger.info(f"Spatial index loaded with {len(rows)} POIs")
+    
+    def clear(self):
+        """Drop all entries so the next query reloads the index"""
+        with self._lock:
+            self._cells = {}
+            self._positions = {}
+            self._category_sizes = {}
+            self._loaded_at = None
+    
+    def upsert(self, poi_id, category_id, lat, lng):
+        """Insert a POI or move it to its new position"""
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet, the next query will read it from the database
+                return
+            self._remove(poi_id)
+            self._insert(poi_id, category_id, lat, lng)
+    
+    def remove(self, poi_id):
+        """Remove a POI from the index"""
+        with self._lock:
+            self._remove(poi_id)
+    
+    def _insert(self, poi_id, category_id, lat, lng):
+        if lat is None or lng is None:
+            return
+        row, col = _cell_for(lat, lng)
+        key = (category_id, row, col)
+        self._cells.setdefault(key, {})[poi_id] = (lat, lng)
+        self._positions[poi_id] = key
+        self._category_sizes[category_id] = self._category_sizes.get(category_id, 0) + 1
+    
+    def _remove(self, poi_id):
+        key = self._positions.pop(poi_id, None)
+        if key is None:
+            return
+        bucket = self._cells.get(key)
+        if bucket is not None:
+            bucket.pop(poi_id, None)
+            if not bucket:
+                del self._cells[key]
+        self._category_sizes[key[0]] -= 1
+    
+    def within_radius(self, category_id, lat, lng, radius_km):
+        """
+        Find all POIs of a category within a radius of a point
+        
+        Args:
+            category_id (int): Category to search
+            lat, lng: Coordinates of the query point
+            radius_km (float): Search radius in kilometers
+            
+        Returns:
+            list: (poi_id, distance_km) tuples sorted by distance
+        """
+        min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, radius_km)
+        min_row, min_col = _cell_for(min_lat, min_lng)
+        max_row, max_col = _cell_for(max_lat, max_lng)
+        
+        candidates = []
+        with self._lock:
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    bucket = self._cells.get((category_id, row, col))
+                    if bucket:
+                        candidates.extend(bucket.items())
+        
+        return _within(candidates, lat, lng, radius_km)
+    
+    def nearest(self, category_id, lat, lng, k, max_distance=None):
+        """
+        Find the k POIs of a category closest to a point
+        
+        Args:
+            category_id (int): Category to search
+            lat, lng: Coordinates of the query point
+            k (int): Maximum number of POIs to return
+            max_distance (float, optional): Ignore POIs further than this (km)
+            
+        Returns:
+            list: Up to k (poi_id, distance_km) tuples sorted by distance
+        """
+        if max_distance is not None:
+            # A bounded query never needs to look past the radius
+            return self.within_radius(category_id, lat, lng, max_distance)[:k]
+        
+        center_row, center_col = _cell_for(lat, lng)
+        results = []
+        visited = 0
+        ring = 0
+        with self._lock:
+            total = self._category_sizes.get(category_id, 0)
+            while visited < total:
+                candidates = []
+                for row, col in _ring_cells(center_row, center_col, ring):
+                    bucket = self._cells.get((category_id, row, col))
+                    if bucket:
+                        candidates.extend(bucket.items())
+                visited += len(candidates)
+                results.extend(_within(candidates, lat, lng))
+                
+                # Anything outside the rings walked so far is at least this far away
+                reach_deg = ring * CELL_SIZE_DEG
+                lower_bound = reach_deg * km_per_deg_lng(abs(lat) + reach_deg + CELL_SIZE_DEG)
+                if len(results) >= k:
+                    results.sort(key=lambda x: x[1])
+                    results = results[:k]
+                    if results[-1][1] <= lower_bound:
+                        break
+                ring += 1
+        
+        results.sort(key=lambda x: x[1])
+        return results[:k]
+
+
+def _within(candidates, lat, lng, radius_km=None):
+    """
+    Compute distances from a point to (poi_id, (lat, lng)) candidates in one batch
+    
+    Returns:
+        list: (poi_id, distance_km) tuples within the radius, sorted by distance
+    """
+    distances = haversine_many(
+        lat, lng,
+        [coords[0] for _, coords in candidates],
+        [coords[1] for _, coords in candidates]
+    )
+    results = [
+        (poi_id, distance)
+        for (poi_id, _), distance in zip(candidates, distances)
+        if radius_km is None or distance <= radius_km
+    ]
+    results.sort(key=lambda x: x[1])
+    return results
+
+
+def _ring_cells(center_row, center_col, ring):
+    """Yield the cells at exactly `ring` steps (Chebyshev distance) from the center"""
+    if ring == 0:
+        yield center_row, center_col
+        return
+    for col in range(center_col - ring, center_col + ring + 1):
+        yield center_row - ring, col
+        yield center_row + ring, col
+    for row in range(center_row - ring + 1, center_row + ring):
+        yield row, center_col - ring
+        yield row, center_col + ring
+
+
+# Shared index for this process
+_index = SpatialIndex()
+
+
+def get_spatial_index():
+    """Return the process-wide spatial index, loading it if needed"""
+    if _index.is_stale():
+        _index.load()
+    return _index
+
+
+def query_pois_within(category_id, lat, lng, max_distance):
+    """
+    Find POIs of a category within a radius using a bounding box in SQL
+    
+    Only rows inside the lat/lng box around the point are read from the
+    database (served by the pois(category_id, lat, lng) index), and only
+    their id and coordinates are transferred. The exact distance is then
+    computed for the survivors.
+    
+    Args:
+        category_id (int): Category to search
+        lat, lng: Coordinates of the query point
+        max_distance (float): Search radius in kilometers
+        
+    Returns:
+        list: (poi_id, distance_km) tuples sorted by distance
+    """
+    min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, max_distance)
+    rows = db.session.query(POI.id, POI.lat, POI.lng).filter(
+        POI.category_id == category_id,
+        POI.lat.between(min_lat, max_lat),
+        POI.lng.between(min_lng, max_lng)
+    ).all()
+    
+    return _within([(poi_id, (poi_lat, poi_lng)) for poi_id, poi_lat, poi_lng in rows], lat, lng, max_distance)
+
+
+def find_nearby_pois(category_id, lat, lng, max_distance, limit):
+    """
+    Find the closest POIs of a category within a radius of a point
+    
+    Uses the in-process spatial index unless SPATIAL_INDEX_ENABLED is turned
+    off in the app config, in which case the bounding-box SQL query is used.
+    
+    Returns:
+        list: Up to `limit` (poi_id, distance_km) tuples sorted by distance
+    """
+    if current_app.config.get("SPATIAL_INDEX_ENABLED", True):
+        return get_spatial_index().nearest(category_id, lat, lng, k=limit, max_distance=max_distance)
+    return query_pois_within(category_id, lat, lng, max_distance)[:limit]
+
+
+# Keep the index in sync with committed POI changes
+def _queue_change(target, change):
+    session = object_session(target)
+    if session is None:
+        return
+    session.info.setdefault(_PENDING_KEY, []).append(change)
+
+
+def queue_index_upserts(session, rows):
+    """
+    Queue index updates for POIs written with bulk statements
+    
+    Bulk INSERT/UPDATE statements do not fire the mapper events below, so
+    callers pass the (id, category_id, lat, lng) of the rows they wrote. The
+    changes are applied when the session commits, like event-driven ones.
+    """
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for poi_id, category_id, lat, lng in rows:
+        pending.append(("upsert", poi_id, category_id, lat, lng))
+
+
+@event.listens_for(POI, "after_insert")
+@event.listens_for(POI, "after_update")
+def _poi_saved(mapper, connection, target):
+    _queue_change(target, ("upsert", target.id, target.category_id, target.lat, target.lng))
+
+
+@event.listens_for(POI, "after_delete")
+def _poi_deleted(mapper, connection, target):
+    _queue_change(target, ("remove", target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session):
+    for change in session.info.pop(_PENDING_KEY, []):
+        if change[0] == "upsert":
+            _index.upsert(*change[1:])
+        else:
+            _index.remove(change[1])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -156,23 +156,28 @@ document.addEventListener('DOMContentLoaded', function() {
         return popupContent;
     };
 
+    // Create a marker with hover effect
+    const createMarker = (item, icon, type) => {
+        const marker = L.marker([item.lat, item.lng], { icon: icon })
+            .bindPopup(createPopup(item, type));
+        
+        // Add hover effects
+        marker.on('mouseover', function() {
+            this._icon.classList.add('highlight-marker');
+            this.openPopup();
+        });
+        
+        marker.on('mouseout', function() {
+            this._icon.classList.remove('highlight-marker');
+        });
+        
+        return marker;
+    };
+
     // Add markers to layers with hover effect
     const addMarkers = (data, layerGroup, icon, type) => {
         data.forEach(item => {
-            const marker = L.marker([item.lat, item.lng], { icon: icon })
-                .bindPopup(createPopup(item, type));
-            
-            // Add hover effects
-            marker.on('mouseover', function() {
-                this._icon.classList.add('highlight-marker');
-                this.openPopup();
-            });
-            
-            marker.on('mouseout', function() {
-                this._icon.classList.remove('highlight-marker');
-            });
-            
-            marker.addTo(layerGroup);
+            createMarker(item, icon, type).addTo(layerGroup);
         });
     };
 
@@ -188,6 +193,14 @@ document.addEventListener('DOMContentLoaded', function() {
             } else {
                 map.removeLayer(layerGroups[layerName]);
             }
+            
+            if (vectorTileLayer) {
+                // Tile styles depend on which categories are visible
+                vectorTileLayer.redraw();
+            } else if (this.checked) {
+                // Newly shown categories need their POIs for the current viewport
+                loadViewportPois();
+            }
         });
     });
 
@@ -360,97 +373,358 @@ document.addEventListener('DOMContentLoaded', function() {
             console.error('Error fetching Airbnbs data:', error);
         });
 
-    // Fetch POIs data from API
-    fetch('/api/pois')
-        .then(response => response.json())
-        .then(poisData => {
-            // Add POI markers for each category
-            Object.entries(poisData).forEach(([category, items]) => {
-                if (layerGroups[category] && items.length > 0) {
-                    const iconType = categoryToIconType[category] || category;
-                    const markerType = categoryToMarkerType[category] || category;
-                    addMarkers(items, layerGroups[category], icons[iconType], markerType);
-                    
-                    // Add trail lines for hiking trails
-                    if (category === 'trails') {
-                        items.forEach(trail => {
-                            if (trail.path && trail.path.length > 0) {
-                                const pathLatLngs = trail.path.map(point => [point.lat, point.lng]);
-                                const pathLine = L.polyline(pathLatLngs, {
-                                    color: '#228B22',
-                                    weight: 5,
-                                    opacity: 0.85,
-                                    lineJoin: 'round',
-                                    lineCap: 'round',
-                                    dashArray: null
-                                }).addTo(layerGroups.trails);
-                                
-                                // Add hover effects for trail lines
-                                pathLine.on('mouseover', function() {
-                                    this.setStyle({
-                                        weight: 8,
-                                        opacity: 1,
-                                        color: '#1E8449'
-                                    });
-                                    
-                                    this.openPopup();
-                                });
-                                
-                                pathLine.on('mouseout', function() {
-                                    this.setStyle({
-                                        weight: 5,
-                                        opacity: 0.85,
-                                        color: '#228B22'
-                                    });
-                                });
-                                
-                                // Create difficulty rating HTML for trails
-                                let difficultyHTML = '';
-                                if (trail.difficulty_rating || trail.difficulty_rating === 0) {
-                                    let difficultyStars = '';
-                                    const ratingValue = trail.difficulty_rating || 0;
-                                    const fullStars = Math.floor(ratingValue);
-                                    
-                                    // Create hiking boot icons for ratings
-                                    for (let i = 0; i < 5; i++) {
-                                        if (i < fullStars) {
-                                            difficultyStars += '<i class="fas fa-hiking"></i>'; // Full hiking boot
-                                        } else {
-                                            difficultyStars += '<i class="far fa-hiking"></i>'; // Empty hiking boot
-                                        }
-                                    }
-                                    
-                                    const ratingText = trail.rating_count 
-                                        ? `${ratingValue} / 5 difficulty (${trail.rating_count} ratings)` 
-                                        : 'Not rated yet';
-                                    
-                                    difficultyHTML = `
-                                    <div class="trail-difficulty">
-                                        <div class="difficulty-rating">
-                                            <span class="difficulty-label">Difficulty: </span>
-                                            <span class="difficulty-stars">${difficultyStars}</span>
-                                            <span class="rating-value">${ratingText}</span>
-                                        </div>
-                                        <a href="/rate-trail/${trail.id}" class="rate-trail-btn">Rate This Trail</a>
-                                    </div>`;
-                                }
-                                
-                                pathLine.bindPopup(`<div class="popup-content">
-                                    <div class="popup-title">${trail.name}</div>
-                                    <div class="popup-info">${trail.description || ''}</div>
-                                    ${difficultyHTML}
-                                    <div class="popup-source">Trail information source:</div>
-                                    ${trail.url ? `<a href="${trail.url}" target="_blank" class="popup-link"><i class="fas fa-external-link-alt"></i> Visit Official Trail Website</a>` : ''}
-                                </div>`);
-                            }
-                        });
-                    }
+    // Decode a Google encoded polyline into [lat, lng] pairs
+    const decodePolyline = (encoded) => {
+        const points = [];
+        let index = 0;
+        let lat = 0;
+        let lng = 0;
+        
+        while (index < encoded.length) {
+            const deltas = [];
+            for (let i = 0; i < 2; i++) {
+                let shift = 0;
+                let result = 0;
+                let byte;
+                do {
+                    byte = encoded.charCodeAt(index++) - 63;
+                    result |= (byte & 0x1f) << shift;
+                    shift += 5;
+                } while (byte >= 0x20);
+                deltas.push(result & 1 ? ~(result >> 1) : result >> 1);
+            }
+            lat += deltas[0];
+            lng += deltas[1];
+            points.push([lat / 1e5, lng / 1e5]);
+        }
+        
+        return points;
+    };
+
+    // Trail paths are sent as encoded polylines
+    const toLatLngs = (path) => typeof path === 'string'
+        ? decodePolyline(path)
+        : path.map(point => Array.isArray(point) ? point : [point.lat, point.lng]);
+
+    // Create the polyline drawn for a hiking trail
+    const createTrailLine = (trail) => {
+        const pathLine = L.polyline(toLatLngs(trail.path), {
+            color: '#228B22',
+            weight: 5,
+            opacity: 0.85,
+            lineJoin: 'round',
+            lineCap: 'round',
+            dashArray: null
+        });
+        
+        // Add hover effects for trail lines
+        pathLine.on('mouseover', function() {
+            this.setStyle({
+                weight: 8,
+                opacity: 1,
+                color: '#1E8449'
+            });
+            
+            this.openPopup();
+        });
+        
+        pathLine.on('mouseout', function() {
+            this.setStyle({
+                weight: 5,
+                opacity: 0.85,
+                color: '#228B22'
+            });
+        });
+        
+        // Create difficulty rating HTML for trails
+        let difficultyHTML = '';
+        if (trail.difficulty_rating || trail.difficulty_rating === 0) {
+            let difficultyStars = '';
+            const ratingValue = trail.difficulty_rating || 0;
+            const fullStars = Math.floor(ratingValue);
+            
+            // Create hiking boot icons for ratings
+            for (let i = 0; i < 5; i++) {
+                if (i < fullStars) {
+                    difficultyStars += '<i class="fas fa-hiking"></i>'; // Full hiking boot
+                } else {
+                    difficultyStars += '<i class="far fa-hiking"></i>'; // Empty hiking boot
                 }
+            }
+            
+            const ratingText = trail.rating_count 
+                ? `${ratingValue} / 5 difficulty (${trail.rating_count} ratings)` 
+                : 'Not rated yet';
+            
+            difficultyHTML = `
+            <div class="trail-difficulty">
+                <div class="difficulty-rating">
+                    <span class="difficulty-label">Difficulty: </span>
+                    <span class="difficulty-stars">${difficultyStars}</span>
+                    <span class="rating-value">${ratingText}</span>
+                </div>
+                <a href="/rate-trail/${trail.id}" class="rate-trail-btn">Rate This Trail</a>
+            </div>`;
+        }
+        
+        pathLine.bindPopup(`<div class="popup-content">
+            <div class="popup-title">${trail.name}</div>
+            <div class="popup-info">${trail.description || ''}</div>
+            ${difficultyHTML}
+            <div class="popup-source">Trail information source:</div>
+            ${trail.url ? `<a href="${trail.url}" target="_blank" class="popup-link"><i class="fas fa-external-link-alt"></i> Visit Official Trail Website</a>` : ''}
+        </div>`);
+        
+        return pathLine;
+    };
+
+    // Markers and trail lines currently drawn, per category and POI id
+    const renderedPois = {};
+
+    // Cluster markers currently drawn, per category
+    const renderedClusters = {};
+
+    // Zoom levels up to this one are served as server-side clusters; read from
+    // the cluster responses, so it is unknown until the first one arrives
+    let clusterMaxZoom = null;
+
+    // Remove the individual POIs drawn for a category
+    const clearCategoryPois = (category) => {
+        const rendered = renderedPois[category];
+        if (rendered) {
+            rendered.forEach(layers => layers.forEach(layer => layerGroups[category].removeLayer(layer)));
+            rendered.clear();
+        }
+    };
+
+    // Remove the clusters drawn for a category
+    const clearCategoryClusters = (category) => {
+        (renderedClusters[category] || []).forEach(layer => layerGroups[category].removeLayer(layer));
+        renderedClusters[category] = [];
+    };
+
+    // Create the marker (and trail line) drawn for a POI
+    const createPoiLayers = (category, item) => {
+        const iconType = categoryToIconType[category] || category;
+        const markerType = categoryToMarkerType[category] || category;
+        const layers = [createMarker(item, icons[iconType], markerType)];
+        
+        // Add trail lines for hiking trails
+        if (category === 'trails' && item.path && item.path.length > 0) {
+            layers.push(createTrailLine(item));
+        }
+        return layers;
+    };
+
+    // Draw the clusters returned for a category
+    const updateCategoryClusters = (category, clusters) => {
+        clearCategoryPois(category);
+        clearCategoryClusters(category);
+        
+        const iconType = categoryToIconType[category] || category;
+        const colorClass = icons[iconType].options.className;
+        
+        clusters.forEach(cluster => {
+            // A lone POI is drawn as its usual marker
+            if (cluster.poi) {
+                createPoiLayers(category, cluster.poi).forEach(layer => {
+                    layer.addTo(layerGroups[category]);
+                    renderedClusters[category].push(layer);
+                });
+                return;
+            }
+            
+            const size = cluster.count < 10 ? 30 : cluster.count < 100 ? 36 : 44;
+            const marker = L.marker([cluster.lat, cluster.lng], {
+                icon: L.divIcon({
+                    className: `${colorClass} cluster-marker`,
+                    html: `<span>${cluster.count}</span>`,
+                    iconSize: [size, size],
+                    iconAnchor: [size / 2, size / 2]
+                })
             });
+            
+            // Zoom in towards the cluster to expand it
+            marker.on('click', () => {
+                map.setView([cluster.lat, cluster.lng], Math.min(map.getZoom() + 2, clusterMaxZoom + 1));
+            });
+            
+            marker.addTo(layerGroups[category]);
+            renderedClusters[category].push(marker);
+        });
+    };
+
+    // Sync a category layer with the POIs returned for the viewport
+    const updateCategoryLayer = (category, items) => {
+        const layerGroup = layerGroups[category];
+        clearCategoryClusters(category);
+        const rendered = renderedPois[category] || (renderedPois[category] = new Map());
+        const visibleIds = new Set(items.map(item => item.id));
+        
+        // Drop POIs that left the viewport
+        rendered.forEach((layers, id) => {
+            if (!visibleIds.has(id)) {
+                layers.forEach(layer => layerGroup.removeLayer(layer));
+                rendered.delete(id);
+            }
+        });
+        
+        items.forEach(item => {
+            const existing = rendered.get(item.id);
+            if (existing) {
+                // Paths are simplified per zoom level, refresh the drawn geometry
+                if (existing.length > 1 && item.path && item.path.length > 0) {
+                    existing[1].setLatLngs(toLatLngs(item.path));
+                }
+                return;
+            }
+            
+            const layers = createPoiLayers(category, item);
+            layers.forEach(layer => layer.addTo(layerGroup));
+            rendered.set(item.id, layers);
+        });
+    };
+
+    // Viewport of the last POI request, used to skip redundant requests
+    let lastRequest = null;
+    let pendingController = null;
+
+    // Fetch the POIs intersecting the current viewport
+    const loadViewportPois = () => {
+        const zoom = map.getZoom();
+        const categories = Object.keys(categoryToIconType).filter(category => map.hasLayer(layerGroups[category]));
+        if (categories.length === 0) {
+            return;
+        }
+        const categoriesKey = categories.join(',');
+        
+        // Nothing to do if the last request already covered this view
+        if (lastRequest && lastRequest.zoom === zoom && lastRequest.categories === categoriesKey &&
+            lastRequest.bounds.contains(map.getBounds())) {
+            return;
+        }
+        
+        // Request a slightly larger area so small pans don't trigger new requests
+        const bounds = map.getBounds().pad(0.25);
+        const bbox = [bounds.getSouth(), bounds.getWest(), bounds.getNorth(), bounds.getEast()]
+            .map(value => value.toFixed(4))
+            .join(',');
+        
+        // Only the latest viewport matters, cancel any request still in flight
+        if (pendingController) {
+            pendingController.abort();
+        }
+        const controller = new AbortController();
+        pendingController = controller;
+        lastRequest = { bounds: bounds, zoom: zoom, categories: categoriesKey };
+        
+        // Zoomed out views get clusters, closer views the individual POIs; the
+        // first request asks for clusters to learn up to which zoom they apply
+        const clustered = clusterMaxZoom === null || zoom <= clusterMaxZoom;
+        const endpoint = clustered ? '/api/pois/clusters' : '/api/pois';
+        
+        fetch(`${endpoint}?bbox=${bbox}&zoom=${zoom}&categories=${encodeURIComponent(categoriesKey)}`, {
+            signal: controller.signal
         })
-        .catch(error => {
-            console.error('Error fetching POIs data:', error);
+            .then(response => response.json())
+            .then(data => {
+                if (clustered) {
+                    clusterMaxZoom = data.max_zoom;
+                    if (zoom > clusterMaxZoom) {
+                        // Too close for clusters, fetch the individual POIs instead
+                        pendingController = null;
+                        lastRequest = null;
+                        loadViewportPois();
+                        return;
+                    }
+                }
+                const byCategory = clustered ? data.clusters : data;
+                Object.entries(byCategory).forEach(([category, items]) => {
+                    if (!layerGroups[category]) {
+                        return;
+                    }
+                    if (clustered) {
+                        updateCategoryClusters(category, items);
+                    } else {
+                        updateCategoryLayer(category, items);
+                    }
+                });
+            })
+            .catch(error => {
+                if (error.name === 'AbortError') {
+                    return;
+                }
+                // Allow the same view to be requested again
+                lastRequest = null;
+                console.error('Error fetching POIs data:', error);
+            })
+            .finally(() => {
+                if (pendingController === controller) {
+                    pendingController = null;
+                }
+            });
+    };
+
+    // Marker colors per category, used when drawing vector tiles
+    const categoryColors = {
+        'huts': '#8B4513',
+        'trails': '#228B22',
+        'cableCars': '#4169E1',
+        'playgrounds': '#FFA500',
+        'adventureParks': '#006400',
+        'bikeRentals': '#008080',
+        'restaurants': '#B22222',
+        'nature': '#4682B4',
+        'museums': '#800080'
+    };
+
+    // Draw POIs and trails from the /tiles vector tile endpoint
+    const createVectorTileLayer = () => {
+        const styles = {};
+        Object.keys(categoryToIconType).forEach(category => {
+            // An empty style list hides the features of a toggled-off category
+            styles[category] = () => map.hasLayer(layerGroups[category]) ? {
+                radius: 7,
+                fill: true,
+                fillColor: categoryColors[category],
+                fillOpacity: 0.9,
+                color: '#FFFFFF',
+                weight: 2
+            } : [];
         });
+        styles.trail_paths = () => map.hasLayer(layerGroups.trails) ? {
+            color: '#228B22',
+            weight: 4,
+            opacity: 0.85
+        } : [];
+        
+        const tileLayer = L.vectorGrid.protobuf('/tiles/{z}/{x}/{y}.mvt', {
+            rendererFactory: L.canvas.tile,
+            vectorTileLayerStyles: styles,
+            interactive: true
+        });
+        
+        tileLayer.on('click', function(e) {
+            const item = e.layer.properties;
+            const type = categoryToMarkerType[item.category] || item.category;
+            L.popup()
+                .setLatLng(e.latlng)
+                .setContent(createPopup(item, type))
+                .openOn(map);
+        });
+        
+        return tileLayer;
+    };
+
+    // Vector tile mode (?mode=tiles) replaces the JSON viewport requests
+    let vectorTileLayer = null;
+    if (new URLSearchParams(window.location.search).get('mode') === 'tiles' && L.vectorGrid) {
+        vectorTileLayer = createVectorTileLayer().addTo(map);
+    } else {
+        // Fetch POIs for the initial view and whenever the map moves
+        map.on('moveend', loadViewportPois);
+        loadViewportPois();
+    }
 
     // Check if URL has focus parameters and handle accordingly
     const urlParams = new URLSearchParams(window.location.search);
@@ -0,0 +1,83 @@
+"""
+Sync History for Italian Alps Vacation Planner
+
+Keeps the log of trekking API synchronizations shown on the admin page in a
+JSON file. Successful syncs also record the region and the watermark (the
+latest updated_at received). The log only keeps the most recent entries, so
+the watermark the next sync starts from is kept in the sync state of
+trekking_api instead.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SYNC_HISTORY_FILE = "sync_history.json"
+MAX_HISTORY_ENTRIES = 50
+
+
+def load_sync_history():
+    """
+    Read the saved sync history, most recent entry first
+    
+    Returns:
+        list: History entries, empty if none were saved or the file is unreadable
+    """
+    try:
+        if os.path.exists(SYNC_HISTORY_FILE):
+            with open(SYNC_HISTORY_FILE, 'r') as f:
+                return json.load(f) or []
+    except Exception as e:
+        logger.error(f"Error reading sync history: {str(e)}")
+    return []
+
+
+def save_sync_history(status, message, region=None, watermark=None):
+    """
+    Save a sync history entry
+    
+    Args:
+        status (str): success, warning or error
+        message (str): Human-readable summary
+        region (str): Region that was synchronized
+        watermark (str): ISO timestamp of the latest change received
+    """
+    try:
+        entry = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": status,
+            "message": message
+        }
+        if region:
+            entry["region"] = region
+        if watermark:
+            entry["watermark"] = watermark
+        
+        # Add new entry at the beginning, keeping only the most recent ones
+        history = load_sync_history()
+        history.insert(0, entry)
+        history = history[:MAX_HISTORY_ENTRIES]
+        
+        with open(SYNC_HISTORY_FILE, 'w') as f:
+            json.dump(history, f, indent=2)
+            
+    except Exception as e:
+        logger.error(f"Error saving sync history: {str(e)}")
+
+
+def get_last_watermark(region):
+    """
+    Watermark of the most recent successful sync of a region in the log
+    
+    Only used for regions whose watermark is not in the sync state yet.
+    
+    Returns:
+        str: ISO timestamp, or None if the region was never synced with one
+    """
+    for entry in load_sync_history():
+        if entry.get("status") == "success" and entry.get("region") == region and entry.get("watermark"):
+            return entry["watermark"]
+    return None
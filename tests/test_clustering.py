@@ -0,0 +1,24 @@
+"""Tests for the marker clusters served to the map"""
+
+from app import db
+from models import POI, Category
+
+
+def test_single_poi_clusters_carry_the_poi(app):
+    category = Category(name="huts", display_name="Mountain Huts")
+    db.session.add_all([
+        POI(name="Rifugio A", lat=46.0, lng=11.0, category=category),
+        POI(name="Rifugio B", lat=46.001, lng=11.001, category=category),
+        POI(name="Rifugio C", lat=46.8, lng=12.2, category=category),
+    ])
+    db.session.commit()
+    
+    response = app.test_client().get("/api/pois/clusters?zoom=6")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["max_zoom"] >= 6
+    
+    clusters = sorted(data["clusters"]["huts"], key=lambda cluster: cluster["count"])
+    assert [cluster["count"] for cluster in clusters] == [1, 2]
+    assert clusters[0]["poi"]["name"] == "Rifugio C"
+    assert "poi" not in clusters[1]
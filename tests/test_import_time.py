@@ -0,0 +1,12 @@
+"""Cold import time of the WSGI entry point, see benchmarks/bench_import_time.py"""
+
+from benchmarks.bench_import_time import DEFAULT_BUDGET_MS, eager_modules, import_time_ms, profile_import
+
+
+def test_cold_import_within_budget_and_lazy():
+    # The fastest of a few runs, so a busy machine does not fail the check
+    profiles = [profile_import() for _ in range(3)]
+    total_ms, imports = min((import_time_ms(imports), imports) for imports in profiles)
+    
+    assert total_ms <= DEFAULT_BUDGET_MS
+    assert eager_modules(imports) == []
@@ -0,0 +1,50 @@
+"""Tests for the map data queries"""
+
+import pytest
+
+from app import db
+from map_data import build_pois_by_category
+from models import POI, Category
+
+
+def add_categories(first, last, pois_per_category=3):
+    """Add categories first..last-1, each with a few trails inside the test viewport"""
+    for index in range(first, last):
+        category = Category(name=f"category-{index}", display_name=f"Category {index}")
+        db.session.add(category)
+        for poi_index in range(pois_per_category):
+            db.session.add(POI(
+                name=f"POI {index}-{poi_index}", lat=46.0 + poi_index * 0.01, lng=11.0,
+                category=category, path=[[46.0, 11.0], [46.05, 11.05]]
+            ))
+    db.session.commit()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"bbox": (45.9, 10.9, 46.1, 11.1), "zoom": 12}])
+def test_statement_count_does_not_grow_with_categories(app, count_statements, kwargs):
+    add_categories(0, 1)
+    with count_statements() as statements:
+        result = build_pois_by_category(**kwargs)
+    assert len(result) == 1
+    single_category = len(statements)
+    
+    add_categories(1, 20)
+    with count_statements() as statements:
+        result = build_pois_by_category(**kwargs)
+    assert len(result) == 20
+    assert all(len(pois) == 3 for pois in result.values())
+    assert len(statements) == single_category == 1
+
+
+def test_viewport_includes_trails_crossing_it_from_far_away(app):
+    category = Category(name="trails", display_name="Hiking Trails")
+    # Starts about 33 km south of the viewport and runs across it
+    db.session.add(POI(
+        name="Alta Via", lat=46.0, lng=11.0, category=category,
+        path=[[46.0, 11.0], [46.35, 11.0], [46.6, 11.05]]
+    ))
+    db.session.add(POI(name="Rifugio", lat=46.2, lng=11.0, category=category))
+    db.session.commit()
+    
+    result = build_pois_by_category(bbox=(46.3, 10.9, 46.4, 11.1), zoom=12)
+    assert [poi["name"] for poi in result["trails"]] == ["Alta Via"]
@@ -0,0 +1,85 @@
+"""Load test of concurrent rating submissions"""
+
+import random
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from models import POI, RATING_VALUES, Category, TrailRating
+from ratings import apply_rating, reconcile_rating_aggregates
+
+THREADS = 8
+SUBMISSIONS_PER_THREAD = 60
+USERS = 6
+TRAILS = 3
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """App on a SQLite file, so every thread gets its own connection"""
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'ratings.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 30}},
+        "LOG_LEVEL": "WARNING",
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def submit_ratings(app, trail_ids, seed, errors):
+    rng = random.Random(seed)
+    with app.app_context():
+        try:
+            for _ in range(SUBMISSIONS_PER_THREAD):
+                poi_id = rng.choice(trail_ids)
+                user = f"user-{rng.randrange(USERS)}"
+                rating = rng.choice(RATING_VALUES)
+                # Retry like a client would when SQLite reports the database as busy
+                for _ in range(20):
+                    try:
+                        apply_rating(poi_id, rating, None, user)
+                        db.session.commit()
+                        break
+                    except OperationalError:
+                        db.session.rollback()
+                else:
+                    raise RuntimeError("database stayed locked")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.session.remove()
+
+
+def test_concurrent_ratings_keep_aggregates_consistent(file_app):
+    category = Category(name="trails", display_name="Hiking Trails")
+    trails = [POI(name=f"Trail {index}", lat=46.0, lng=11.0, category=category) for index in range(TRAILS)]
+    db.session.add_all(trails)
+    db.session.commit()
+    trail_ids = [trail.id for trail in trails]
+    
+    errors = []
+    threads = [
+        threading.Thread(target=submit_ratings, args=(file_app, trail_ids, seed, errors))
+        for seed in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    
+    db.session.expire_all()
+    for trail in POI.query.filter(POI.id.in_(trail_ids)):
+        ratings = [rating.rating for rating in TrailRating.query.filter_by(poi_id=trail.id)]
+        # One rating per user, each user's last submission replacing the earlier ones
+        assert len(ratings) == len({rating.user_identifier for rating in trail.trail_ratings}) <= USERS
+        assert trail.rating_count == len(ratings)
+        assert trail.rating_sum == sum(ratings)
+        assert trail.rating_histogram() == {str(value): ratings.count(value) for value in RATING_VALUES}
+    
+    assert reconcile_rating_aggregates(fix=False)["mismatched"] == 0
@@ -0,0 +1,78 @@
+"""Radius and nearest-neighbour queries checked against a brute-force scan"""
+
+import math
+import random
+
+import pytest
+
+from app import db
+from geo import EARTH_RADIUS_KM
+from models import POI, Category
+from spatial_index import SpatialIndex, _within, query_pois_within
+
+
+def destination(lat, lng, distance_km, bearing):
+    """Point at a distance and bearing (radians) from a start point on the sphere"""
+    lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+    angle = distance_km / EARTH_RADIUS_KM
+    dest_lat = math.asin(
+        math.sin(lat_rad) * math.cos(angle) + math.cos(lat_rad) * math.sin(angle) * math.cos(bearing)
+    )
+    dest_lng = lng_rad + math.atan2(
+        math.sin(bearing) * math.sin(angle) * math.cos(lat_rad),
+        math.cos(angle) - math.sin(lat_rad) * math.sin(dest_lat)
+    )
+    return math.degrees(dest_lat), math.degrees(dest_lng)
+
+
+def by_distance(results):
+    """Results in a canonical order (POIs placed symmetrically tie on distance)"""
+    return sorted(results, key=lambda x: (x[1], x[0]))
+
+
+@pytest.fixture
+def queries(app):
+    """Query points, each with POIs just inside and just outside its radius in every direction"""
+    rng = random.Random(7)
+    category = Category(name="trails", display_name="Hiking Trails")
+    db.session.add(category)
+    db.session.flush()
+    
+    queries = []
+    rows = []
+    for _ in range(20):
+        lat, lng = rng.uniform(-75, 75), rng.uniform(-170, 170)
+        radius_km = rng.choice([5, 25, 273.35])
+        queries.append((lat, lng, radius_km))
+        for bearing in [index * math.pi / 8 for index in range(16)]:
+            for factor in (0.999, 0.9999, 1.0001, 0.5):
+                poi_lat, poi_lng = destination(lat, lng, radius_km * factor, bearing)
+                rows.append({"name": "POI", "lat": poi_lat, "lng": poi_lng, "category_id": category.id})
+    db.session.bulk_insert_mappings(POI, rows)
+    db.session.commit()
+    
+    candidates = [(poi_id, (lat, lng)) for poi_id, lat, lng in db.session.query(POI.id, POI.lat, POI.lng)]
+    return category.id, candidates, queries
+
+
+def test_radius_queries_match_brute_force(queries):
+    category_id, candidates, points = queries
+    index = SpatialIndex()
+    index.load()
+    
+    for lat, lng, radius_km in points:
+        expected = by_distance(_within(candidates, lat, lng, radius_km))
+        assert len(expected) >= 16 * 3
+        assert by_distance(query_pois_within(category_id, lat, lng, radius_km)) == expected
+        assert by_distance(index.within_radius(category_id, lat, lng, radius_km)) == expected
+        assert by_distance(index.nearest(category_id, lat, lng, k=len(candidates), max_distance=radius_km)) == expected
+
+
+def test_nearest_matches_brute_force(queries):
+    category_id, candidates, points = queries
+    index = SpatialIndex()
+    index.load()
+    
+    for lat, lng, _ in points:
+        expected = [distance for _, distance in _within(candidates, lat, lng)[:10]]
+        assert [distance for _, distance in index.nearest(category_id, lat, lng, k=10)] == expected
@@ -0,0 +1,93 @@
+"""Tests of the trekking API sync against a local stub of the API"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import sync_history
+import trekking_api
+from app import db
+from models import POI, Category
+
+CATALOGUE = [
+    {"id": index, "name": f"Trail {index}", "lat": 46.0 + index / 1000, "lng": 11.0,
+     "updated_at": f"2026-01-{index:02d}T00:00:00Z"}
+    for index in range(1, 24)
+]
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Serves CATALOGUE page by page like the trekking API"""
+    
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        page, limit = int(params["page"]), int(params["limit"])
+        updated_since = params.get("updated_since")
+        self.server.requests.append((page, limit))
+        self.server.updated_since.append(updated_since)
+        trails = [trail for trail in CATALOGUE if not updated_since or trail["updated_at"].rstrip("Z") > updated_since]
+        body = json.dumps({"trails": trails[(page - 1) * limit:page * limit]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api(app, tmp_path, monkeypatch):
+    """Point the sync at a local stub API, with its state files in a temporary directory"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    server.requests = []
+    server.updated_since = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    monkeypatch.setattr(trekking_api, "API_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(trekking_api, "SYNC_STATE_FILE", str(tmp_path / "sync_state.json"))
+    monkeypatch.setattr(sync_history, "SYNC_HISTORY_FILE", str(tmp_path / "sync_history.json"))
+    monkeypatch.setenv("TREKKING_API_KEY", "test")
+    db.session.add(Category(name="trails", display_name="Hiking Trails"))
+    db.session.commit()
+    
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_resume_after_partial_sync_keeps_page_size(stub_api):
+    first = trekking_api.sync_trails_from_api(limit=10)
+    assert (first["fetched"], first["complete"]) == (10, False)
+    
+    # Resumed without a limit: the remaining pages are still 10 trails long
+    second = trekking_api.sync_trails_from_api()
+    assert second["complete"]
+    assert stub_api.requests == [(1, 10), (2, 10), (3, 10)]
+    assert POI.query.count() == len(CATALOGUE)
+    assert trekking_api._load_sync_state() == {trekking_api.DEFAULT_REGION: {"watermark": "2026-01-23T00:00:00"}}
+
+
+def test_full_sync_discards_resume_point(stub_api):
+    trekking_api.sync_trails_from_api(limit=10)
+    
+    result = trekking_api.sync_trails_from_api(full=True)
+    assert result["complete"]
+    assert stub_api.requests[1:] == [(1, 100)]
+    assert POI.query.count() == len(CATALOGUE)
+
+
+def test_delta_sync_uses_watermark_after_history_rotates(stub_api):
+    trekking_api.run_trail_sync()
+    # Later failed runs push the successful one out of the history
+    for _ in range(sync_history.MAX_HISTORY_ENTRIES + 5):
+        sync_history.save_sync_history("error", "Error: API unavailable", region=trekking_api.DEFAULT_REGION)
+    
+    result = trekking_api.sync_trails_from_api()
+    assert (result["complete"], result["fetched"]) == (True, 0)
+    assert stub_api.updated_since == [None, "2026-01-23T00:00:00"]
@@ -0,0 +1,207 @@
+"""
+Text Extraction for Italian Alps Vacation Planner
+
+CPU-bound helpers that turn downloaded trail pages into descriptions and
+trail lists. This module deliberately imports nothing from the app, so
+enrichment and the family trails scraper can run it in worker processes
+without loading Flask or opening database connections.
+"""
+
+import functools
+
+import trafilatura
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # lxml is optional, BeautifulSoup falls back to the slower built-in parser
+    HTML_PARSER = "html.parser"
+
+
+# Keywords marking a paragraph as trail information, with their weights
+DEFAULT_KEYWORD_WEIGHTS = {
+    'hiking': 1, 'trail': 1, 'path': 1, 'route': 1, 'trek': 1, 'mountain': 1, 'hike': 1,
+    'difficulty': 1, 'scenic': 1, 'panoramic': 1, 'family': 1, 'children': 1,
+    'distance': 1, 'elevation': 1, 'duration': 1, 'alpine': 1
+}
+
+# Added to the score of paragraphs mentioning the trail by name
+TRAIL_NAME_WEIGHT = 3
+
+# Paragraphs must score above this to be used
+RELEVANCE_THRESHOLD = 1
+
+# Paragraphs shorter than this are ignored
+MIN_PARAGRAPH_LENGTH = 40
+
+# Maximum length of a description built from paragraphs, and of the fallback
+MAX_DESCRIPTION_LENGTH = 600
+FALLBACK_LENGTH = 500
+
+
+class KeywordScorer:
+    """
+    Scores text by the weighted keywords it contains
+    
+    Each keyword counts once however often it occurs, and occurrences inside
+    other words count too (plain substring matching). Keywords are lowercased
+    once here and matched against text the caller has already lowercased, so
+    scoring a sentence costs one C-level substring search per keyword and no
+    per-keyword case conversion.
+    """
+    
+    def __init__(self, keyword_weights):
+        weights = {}
+        for keyword, weight in keyword_weights.items():
+            keyword = keyword.lower()
+            weights[keyword] = weights.get(keyword, 0) + weight
+        self.weights = tuple(weights.items())
+    
+    def score(self, lowered_text):
+        """Sum of the weights of the keywords found in already lowercased text"""
+        return sum(weight for keyword, weight in self.weights if keyword in lowered_text)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_scorer(keyword_items):
+    return KeywordScorer(dict(keyword_items))
+
+
+def extract_clean_description(content, trail_name, keyword_weights=None):
+    """
+    Extract a clean, useful description from raw content
+    
+    Sentences are scored by the weighted keywords they contain, plus
+    TRAIL_NAME_WEIGHT if they mention the trail, and the best ones are kept
+    up to MAX_DESCRIPTION_LENGTH characters.
+    
+    Args:
+        content (str): Main text of a trail page
+        trail_name (str): Name of the trail
+        keyword_weights (dict): Keyword -> weight, DEFAULT_KEYWORD_WEIGHTS if not given
+        
+    Returns:
+        str: The description
+    """
+    keyword_weights = DEFAULT_KEYWORD_WEIGHTS if keyword_weights is None else keyword_weights
+    scorer = _get_scorer(tuple(keyword_weights.items()))
+    
+    # Collapse whitespace runs (str.split() splits on exactly the characters \s matches)
+    clean_content = " ".join(content.split())
+    name = trail_name.lower()
+    
+    # Split into sentences, lowercasing the whole text once for matching
+    paragraphs = clean_content.split('. ')
+    lowered_paragraphs = clean_content.lower().split('. ')
+    relevant_paragraphs = []
+    
+    for paragraph, lowered in zip(paragraphs, lowered_paragraphs):
+        paragraph = paragraph.strip()
+        # Skip very short paragraphs
+        if len(paragraph) < MIN_PARAGRAPH_LENGTH:
+            continue
+        
+        # Matched like the sentence as it is kept, with its full stop
+        lowered = lowered.strip() + '.'
+        score = scorer.score(lowered)
+        
+        # If trail name is in paragraph, boost score
+        if name in lowered:
+            score += TRAIL_NAME_WEIGHT
+        
+        if score > RELEVANCE_THRESHOLD:  # Only include if it has some relevance
+            relevant_paragraphs.append((paragraph + '.', score))
+    
+    # Sort by relevance score
+    relevant_paragraphs.sort(key=lambda x: x[1], reverse=True)
+    
+    # Take top paragraphs up to the maximum length
+    selected = []
+    char_count = 0
+    
+    for paragraph, _ in relevant_paragraphs:
+        if char_count + len(paragraph) > MAX_DESCRIPTION_LENGTH:
+            break
+        selected.append(paragraph)
+        char_count += len(paragraph)
+    
+    # If no relevant paragraphs found, just take the first characters
+    if not selected:
+        return (clean_content[:FALLBACK_LENGTH] + "...").strip()
+    
+    return " ".join(selected)
+
+
+def extract_text_and_description(html, trail_name):
+    """
+    Extract the main text and a trail description from a downloaded page
+    
+    Args:
+        html (bytes): Page content
+        trail_name (str): Name of the trail, used to rank paragraphs
+        
+    Returns:
+        tuple: (main text, description), both None if the page has no main text
+    """
+    content = trafilatura.extract(html)
+    if not content:
+        return None, None
+    return content, extract_clean_description(content, trail_name)
+
+
+def _mentions_children(text):
+    """Whether a (lowercased) text is about family hiking"""
+    return 'family' in text or 'child' in text or 'kid' in text
+
+
+def extract_family_trail_sections(html):
+    """
+    Find family trail entries on a family hiking page
+    
+    The page is parsed once. Entries come from trail cards (articles, cards
+    and similar blocks whose heading mentions families or children); pages
+    without any fall back to long family-related paragraphs, named after the
+    heading before them.
+    
+    Args:
+        html (bytes): Page content
+        
+    Returns:
+        list: (name, description, href) tuples; description and href are
+        None when the entry has none
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    sections = []
+    
+    # Different websites have different structures - try various selectors
+    for section in soup.select('article, .trail-item, .hike-item, .card, .excursion-item, .content-block'):
+        # Try to find the trail name from headers or strong texts
+        name_elem = section.select_one('h2, h3, h4, strong.title, .card-title')
+        if not name_elem or not _mentions_children(name_elem.text.lower()):
+            continue
+        trail_name = name_elem.text.strip()
+        if not trail_name:
+            continue
+        
+        # Look for description
+        desc_elem = section.select_one('p, .description, .card-text')
+        trail_desc = desc_elem.text.strip() if desc_elem else None
+        
+        # Look for URL
+        url_elem = section.select_one('a')
+        href = url_elem['href'] if url_elem and url_elem.has_attr('href') else None
+        
+        sections.append((trail_name, trail_desc or None, href))
+    
+    # If no structured elements were found, extract from the general text
+    if not sections:
+        for para in soup.select('p'):
+            text = para.text.strip()
+            if _mentions_children(text.lower()) and len(text) > 100:
+                # Look for potential trail names in nearby headings
+                prev_heading = para.find_previous(['h1', 'h2', 'h3', 'h4'])
+                if prev_heading:
+                    sections.append((prev_heading.text.strip(), text, None))
+    
+    return sections
@@ -6,17 +6,145 @@ from external sources and AI-powered analysis.
 """
 
 import os
-import re
 import logging
 import json
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
 import trafilatura
 from models import POI, Category, TrailRating, db
-from sqlalchemy import desc
+from sqlalchemy import desc, update
+from text_extraction import extract_clean_description, extract_text_and_description
+from http_cache import get_http_cache
+from page_parsing import fetch_and_parse
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Concurrency limits of batch enrichment
+FETCH_WORKERS = 16  # Pages downloaded in parallel
+PER_HOST_LIMIT = 2  # Parallel downloads from the same host
+REQUESTS_PER_SECOND = 10.0  # Global download rate
+FETCH_TIMEOUT = 15  # Seconds per download attempt
+FETCH_RETRIES = 2  # Extra attempts after a failed download
+EXTRACT_PROCESSES = max(1, (os.cpu_count() or 2) - 1)  # Processes extracting descriptions
+COMMIT_BATCH_SIZE = 50  # Descriptions written per transaction
+
+# Statuses worth retrying a download for
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Shared HTTP session, sized for FETCH_WORKERS concurrent downloads"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=FETCH_WORKERS, pool_maxsize=FETCH_WORKERS)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "ItalianAlpsVacationPlanner/1.0 (trail enrichment)"
+            _session = session
+        return _session
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at a maximum rate"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+    
+    def wait(self):
+        """Block until the next call is allowed"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HostLimiter:
+    """Caps the number of concurrent downloads per host"""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._semaphores = {}
+    
+    def for_url(self, url):
+        """Semaphore to hold while downloading from the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limit)
+            return self._semaphores[host]
+
+
+class HostRateLimiter:
+    """Spaces downloads from the same host at least `delay` seconds apart"""
+    
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._limiters = {}
+    
+    def for_url(self, url):
+        """RateLimiter to wait on before downloading from the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(1.0 / self.delay if self.delay else 0)
+            return self._limiters[host]
+
+
+def fetch_page(url, rate_limiter=None, host_limiter=None):
+    """
+    Download a page with timeouts and retries, through the HTTP cache
+    
+    Args:
+        url (str): Page to download
+        rate_limiter (RateLimiter): Global limiter to wait on before each attempt
+        host_limiter (HostLimiter): Per-host concurrency limiter
+        
+    Returns:
+        CachedPage: The page, or None if it could not be downloaded
+    """
+    session = _get_session()
+    cache = get_http_cache()
+    for attempt in range(FETCH_RETRIES + 1):
+        if attempt:
+            # Back off before retrying: 1 s, 2 s, ...
+            time.sleep(2 ** (attempt - 1))
+        if rate_limiter:
+            rate_limiter.wait()
+        try:
+            if host_limiter:
+                with host_limiter.for_url(url):
+                    response = cache.fetch(url, session=session, timeout=FETCH_TIMEOUT)
+            else:
+                response = cache.fetch(url, session=session, timeout=FETCH_TIMEOUT)
+        except requests.RequestException as e:
+            logger.warning(f"Error downloading {url} (attempt {attempt + 1}): {str(e)}")
+            continue
+        
+        if response.status_code in RETRY_STATUSES:
+            logger.warning(f"Got {response.status_code} from {url} (attempt {attempt + 1})")
+            continue
+        if response.status_code != 200:
+            logger.error(f"Failed to download content from {url}: status {response.status_code}")
+            return None
+        return response
+    
+    logger.error(f"Failed to download content from {url} after {FETCH_RETRIES + 1} attempts")
+    return None
+
 def get_website_text_content(url):
     """
     This function takes a url and returns the main text content of the website.
@@ -24,17 +152,24 @@ def get_website_text_content(url):
     """
     try:
         # Send a request to the website
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            text = trafilatura.extract(downloaded)
-            return text
+        page = fetch_page(url)
+        if page:
+            # Parsed once per distinct page body
+            return get_http_cache().extracted_text(page, trafilatura.extract, name="trafilatura")
         else:
-            logger.error(f"Failed to download content from {url}")
             return None
     except Exception as e:
         logger.error(f"Error scraping {url}: {str(e)}")
         return None
 
+def _needs_description():
+    """Filter matching trails without a description or with a minimal one"""
+    return (
+        (POI.description.is_(None)) | 
+        (POI.description == '') | 
+        (db.func.length(POI.description) < 50)
+    )
+
 def get_trails_without_descriptions():
     """
     Get all trails that don't have descriptions or have minimal descriptions
@@ -46,11 +181,7 @@ def get_trails_without_descriptions():
         return []
     
     # Get trails with no description or short descriptions
-    trails = POI.query.filter_by(category_id=trails_category.id).filter(
-        (POI.description.is_(None)) | 
-        (POI.description == '') | 
-        (db.func.length(POI.description) < 50)
-    ).all()
+    trails = POI.query.filter_by(category_id=trails_category.id).filter(_needs_description()).all()
     
     return trails
 
@@ -73,61 +204,6 @@ def update_trail_description(trail_id, new_description):
         logger.error(f"Error updating trail description: {str(e)}")
         return False
 
-def extract_clean_description(content, trail_name):
-    """
-    Extract a clean, useful description from raw content
-    """
-    # Remove extra whitespace
-    clean_content = re.sub(r'\s+', ' ', content).strip()
-    
-    # Try to find a good paragraph to use (looking for keywords)
-    keywords = ['hiking', 'trail', 'path', 'route', 'trek', 'mountain', 'hike', 
-                'difficulty', 'scenic', 'panoramic', 'family', 'children', 
-                'distance', 'elevation', 'duration', 'alpine']
-    
-    # Try to find paragraphs containing trail info
-    paragraphs = clean_content.split('. ')
-    relevant_paragraphs = []
-    
-    for paragraph in paragraphs:
-        # Skip very short paragraphs
-        if len(paragraph.strip()) < 40:
-            continue
-            
-        paragraph = paragraph.strip() + '.'
-        score = 0
-        
-        # Score the paragraph based on keywords
-        for keyword in keywords:
-            if keyword.lower() in paragraph.lower():
-                score += 1
-                
-        # If trail name is in paragraph, boost score
-        if trail_name.lower() in paragraph.lower():
-            score += 3
-            
-        if score > 1:  # Only include if it has some relevance
-            relevant_paragraphs.append((paragraph, score))
-    
-    # Sort by relevance score
-    relevant_paragraphs.sort(key=lambda x: x[1], reverse=True)
-    
-    # Take top paragraphs up to ~500 chars
-    description = ""
-    char_count = 0
-    
-    for paragraph, _ in relevant_paragraphs:
-        if char_count + len(paragraph) > 600:
-            break
-        description += " " + paragraph
-        char_count += len(paragraph)
-    
-    # If no relevant paragraphs found, just take the first 500 characters
-    if not description:
-        description = clean_content[:500] + "..."
-    
-    return description.strip()
-
 def enrich_trail_data(trail):
     """
     Enrich a trail's data with information scraped from its URL
@@ -148,23 +224,122 @@ def enrich_trail_data(trail):
     # Update the trail's description
     return update_trail_description(trail.id, description)
 
-def batch_enrich_trails(limit=5):
+def enrich_trail_by_id(trail_id, progress=None):
+    """
+    Enrich a single trail, as a background job
+    """
+    trail = POI.query.get(trail_id)
+    if not trail:
+        raise ValueError(f"Trail with ID {trail_id} not found")
+    
+    enriched = enrich_trail_data(trail)
+    if progress:
+        progress(1, 1, trail.name)
+    
+    return {"trail_id": trail_id, "name": trail.name, "enriched": enriched}
+
+def batch_enrich_trails(limit=5, progress=None):
     """
     Enrich multiple trails with scraped data
+    
+    Pages are downloaded concurrently (FETCH_WORKERS threads, at most
+    PER_HOST_LIMIT per host and REQUESTS_PER_SECOND overall), descriptions
+    are extracted in a pool of worker processes as pages arrive, and results
+    are written COMMIT_BATCH_SIZE trails per transaction. Only trails with a
+    URL are picked, since the others cannot be enriched.
+    
+    Calls `progress(done, total, trail_name)` after each trail if given.
     """
-    trails = get_trails_without_descriptions()
+    trails_category = Category.query.filter_by(name="trails").first()
+    if not trails_category:
+        logger.error("Trails category not found")
+        return {"processed": 0, "enriched": 0, "failed": 0, "remaining": 0}
+    
+    candidates = db.session.query(POI.id).filter(
+        POI.category_id == trails_category.id,
+        _needs_description(),
+        POI.url.isnot(None),
+        POI.url != ''
+    )
+    total_candidates = candidates.count()
+    batch = db.session.query(POI.id, POI.name, POI.url).filter(
+        POI.id.in_(candidates.order_by(POI.id).limit(limit).scalar_subquery())
+    ).order_by(POI.id).all()
+    
     enriched_count = 0
+    failed_count = 0
+    done = 0
+    pending_updates = []
     
-    for trail in trails[:limit]:
-        if enrich_trail_data(trail):
+    cache = get_http_cache()
+    rate_limiter = RateLimiter(REQUESTS_PER_SECOND)
+    host_limiter = HostLimiter(PER_HOST_LIMIT)
+    
+    def record(trail, description):
+        nonlocal enriched_count, failed_count, done, pending_updates
+        done += 1
+        if description:
+            pending_updates.append({"id": trail.id, "description": description})
             enriched_count += 1
+        else:
+            failed_count += 1
+        if len(pending_updates) >= COMMIT_BATCH_SIZE:
+            _write_descriptions(pending_updates)
+            pending_updates = []
+        if progress:
+            progress(done, len(batch), trail.name)
+    
+    def fetch(trail):
+        return fetch_page(trail.url, rate_limiter, host_limiter)
+    
+    cached_texts = {}
+    
+    def extraction_task(trail, page):
+        # Pages seen before only need their cached text ranked
+        text = cache.get_text(page.content_hash, name="trafilatura")
+        if text is not None:
+            cached_texts[trail.id] = text
+            return None
+        return extract_text_and_description, (page.content, trail.name)
     
+    pages = fetch_and_parse(batch, fetch, extraction_task, FETCH_WORKERS, EXTRACT_PROCESSES, "enrich-fetch")
+    for trail, page, extraction in pages:
+        if not page:
+            record(trail, None)
+            continue
+        if extraction is None:
+            text = cached_texts.pop(trail.id)
+            record(trail, extract_clean_description(text, trail.name) if text else None)
+            continue
+        try:
+            text, description = extraction.result()
+        except Exception as e:
+            logger.error(f"Error extracting description of trail {trail.name}: {str(e)}")
+            record(trail, None)
+            continue
+        cache.put_text(page.content_hash, text, name="trafilatura")
+        record(trail, description)
+    
+    if pending_updates:
+        _write_descriptions(pending_updates)
+    
+    logger.info(f"Enriched {enriched_count} of {len(batch)} trails ({failed_count} failed)")
     return {
-        "processed": min(limit, len(trails)),
+        "processed": len(batch),
         "enriched": enriched_count,
-        "remaining": max(0, len(trails) - limit)
+        "failed": failed_count,
+        "remaining": max(0, total_candidates - len(batch))
     }
 
+def _write_descriptions(updates):
+    """Write a batch of descriptions in one UPDATE statement and commit it"""
+    try:
+        db.session.execute(update(POI), updates)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
 # If you have an OpenAI API key, you could use this function to generate better descriptions
 def generate_ai_description(trail_name, raw_content):
     """
@@ -198,7 +373,9 @@ def generate_ai_description(trail_name, raw_content):
 
 if __name__ == "__main__":
     # This code will run when the script is executed directly
-    result = batch_enrich_trails(limit=5)
+    from app import app
+    with app.app_context():
+        result = batch_enrich_trails(limit=5)
     print(f"Processed {result['processed']} trails")
     print(f"Enriched {result['enriched']} trails")
     print(f"Remaining {result['remaining']} trails to process")
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Bulk Trail Import for Italian Alps Vacation Planner
+
+Shared importer used by the trekking API, family trails and scraped trails
+loaders. Existing names are read once per import and new trails are written
+with batched multi-row INSERTs, so the cost grows with the number of batches
+rather than with one query per incoming trail.
+
+Bulk statements skip the ORM's per-object events, so the work those events
+normally do (simplified paths and bounds, spatial index updates) is done here instead;
+the dataset version is bumped by the bulk statements themselves.
+"""
+
+import logging
+
+from sqlalchemy import insert, update
+
+from geo import encode_polyline, normalize_path, simplify_for_zoom_levels
+from models import POI, Category, db
+from spatial_index import queue_index_upserts
+from trail_recommendation import refresh_nearby_trails_for_trails
+
+logger = logging.getLogger(__name__)
+
+# Trails written per INSERT statement and transaction
+IMPORT_BATCH_SIZE = 1000
+
+
+def _trail_row(trail, category_id):
+    """
+    Build the pois row for an incoming trail
+    
+    Returns:
+        dict: Column values, or None if the trail lacks a name or coordinates
+    """
+    name = trail.get('name')
+    lat = trail.get('lat')
+    lng = trail.get('lng')
+    if not name or lat is None or lng is None:
+        return None
+    
+    points = normalize_path(trail.get('path'))
+    path_polyline = encode_polyline(points) if points else None
+    
+    return {
+        'name': name,
+        'lat': lat,
+        'lng': lng,
+        'description': trail.get('description', ''),
+        'url': trail.get('url', ''),
+        'category_id': category_id,
+        'path_polyline': path_polyline,
+        'path_simplified': simplify_for_zoom_levels(points),
+        **POI.path_bounds_values(points),
+        'difficulty_rating': trail.get('difficulty_rating') or 0,
+        'rating_count': trail.get('rating_count') or 0,
+        'external_id': trail.get('external_id'),
+        'external_updated_at': trail.get('updated_at')
+    }
+
+
+# Columns an update from the external source may change; ratings stay local
+UPDATABLE_COLUMNS = (
+    'name', 'lat', 'lng', 'description', 'url', 'path_polyline', 'path_simplified',
+    'path_min_lat', 'path_min_lng', 'path_max_lat', 'path_max_lng', 'external_id', 'external_updated_at'
+)
+
+
+class TrailImporter:
+    """
+    Incremental bulk importer for trails arriving in chunks
+    
+    Reads the category's existing trails once, then accepts trails through
+    add() as they arrive (e.g. page by page from an API), writing a batch
+    whenever one fills up. Trails carrying an external_id are identified by
+    it: they update the trail previously imported with that ID (or link an
+    unlinked trail of the same name) when their updated_at is newer, and are
+    inserted otherwise, even if another trail has the same name. Trails
+    without an external_id are inserted unless their name is taken.
+    flush() writes and commits the pending partial batches, and finish()
+    refreshes the nearby-trails table for everything written.
+    """
+    
+    def __init__(self, category_name='trails', batch_size=IMPORT_BATCH_SIZE):
+        self.category_name = category_name
+        self.batch_size = batch_size
+        self.inserted_ids = []
+        self.updated_ids = []
+        self.skipped = 0
+        self._inserts = []
+        self._updates = []
+        self.known_names = {}  # name -> ID of a trail not linked to an external ID, or None
+        self.known_external = {}  # external ID -> (trail ID or None if queued for insertion, external_updated_at)
+        
+        self.category = Category.query.filter_by(name=category_name).first()
+        if not self.category:
+            logger.error(f"Category '{category_name}' not found in database")
+            return
+        
+        # One query for every trail already in the category
+        for poi_id, name, external_id, external_updated_at in db.session.query(
+            POI.id, POI.name, POI.external_id, POI.external_updated_at
+        ).filter(POI.category_id == self.category.id):
+            if external_id is None:
+                self.known_names[name] = poi_id
+            else:
+                self.known_names.setdefault(name, None)
+                self.known_external[external_id] = (poi_id, external_updated_at)
+    
+    def add(self, trails):
+        """Queue trails for insertion or update, writing every batch that fills up"""
+        if not self.category:
+            return
+        
+        for trail in trails:
+            name = trail.get('name')
+            external_id = trail.get('external_id')
+            
+            existing_id = None
+            if external_id is not None:
+                # The external ID is the trail's identity; names may repeat
+                known = self.known_external.get(external_id)
+                if known is None:
+                    # Link a trail imported by name before external IDs were stored
+                    existing_id = self.known_names.get(name)
+                elif known[0] is None:
+                    # Already queued for insertion by this import
+                    self.skipped += 1
+                    continue
+                else:
+                    existing_id, updated_at = known
+                    if updated_at and trail.get('updated_at') and trail['updated_at'] <= updated_at:
+                        # Unchanged since it was last imported
+                        self.skipped += 1
+                        continue
+            elif name in self.known_names:
+                self.skipped += 1
+                continue
+            
+            row = _trail_row(trail, self.category.id)
+            if row is None:
+                logger.warning(f"Skipping trail without name or coordinates: {name!r}")
+                self.skipped += 1
+                continue
+            
+            if existing_id is not None:
+                self._updates.append({'id': existing_id, **{key: row[key] for key in UPDATABLE_COLUMNS}})
+                self.known_external[external_id] = (existing_id, row['external_updated_at'])
+                self.known_names[name] = None
+            else:
+                # Also drops duplicates within the incoming data
+                self._inserts.append(row)
+                self.known_names[name] = None
+                if external_id is not None:
+                    self.known_external[external_id] = (None, row['external_updated_at'])
+            
+            if len(self._inserts) >= self.batch_size or len(self._updates) >= self.batch_size:
+                self.flush()
+    
+    def flush(self):
+        """Write and commit the trails queued so far"""
+        inserts, self._inserts = self._inserts, []
+        updates, self._updates = self._updates, []
+        if inserts:
+            self.inserted_ids.extend(_insert_batch(inserts))
+        if updates:
+            self.updated_ids.extend(_update_batch(updates, self.category.id))
+    
+    def finish(self):
+        """
+        Flush the remaining trails and update the nearby-trails table
+        
+        Returns:
+            dict: Number of trails inserted, updated and skipped (duplicates,
+            unchanged or invalid rows)
+        """
+        self.flush()
+        
+        changed_ids = self.inserted_ids + self.updated_ids
+        if changed_ids:
+            # Update the precomputed nearest trails of the affected Airbnbs
+            try:
+                refresh_nearby_trails_for_trails(changed_ids)
+            except Exception as e:
+                logger.error(f"Error updating nearby trails: {str(e)}")
+        
+        logger.info(f"Imported {len(self.inserted_ids)} trails into '{self.category_name}', "
+                    f"updated {len(self.updated_ids)}, skipped {self.skipped}")
+        return {"inserted": len(self.inserted_ids), "updated": len(self.updated_ids), "skipped": self.skipped}
+
+
+def import_trails(trails, category_name='trails', batch_size=IMPORT_BATCH_SIZE):
+    """
+    Insert the trails whose name is not yet used in the category, and update
+    the ones matching a previously imported external_id
+    
+    Args:
+        trails (iterable): Dicts with name, lat, lng and optionally description,
+            url, path, difficulty_rating, rating_count, external_id and
+            updated_at (a datetime)
+        category_name (str): Name of the category to add the trails to
+        batch_size (int): Number of trails inserted per statement
+        
+    Returns:
+        dict: Number of trails inserted, updated and skipped
+    """
+    importer = TrailImporter(category_name, batch_size)
+    importer.add(trails)
+    return importer.finish()
+
+
+def _insert_batch(rows):
+    """Insert a batch of trail rows in one statement and commit it"""
+    try:
+        result = db.session.execute(
+            insert(POI).returning(POI.id, POI.category_id, POI.lat, POI.lng),
+            rows
+        )
+        inserted = result.all()
+        queue_index_upserts(db.session, inserted)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [row.id for row in inserted]
+
+
+def _update_batch(rows, category_id):
+    """Update a batch of trails by primary key in one statement and commit it"""
+    try:
+        db.session.execute(update(POI), rows)
+        queue_index_upserts(db.session, [(row['id'], category_id, row['lat'], row['lng']) for row in rows])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [row['id'] for row in rows]
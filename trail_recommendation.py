@@ -6,45 +6,21 @@ including difficulty level, proximity to accommodation, and family friendliness.
 """
 
 from flask import current_app
-from models import POI, TrailRating, Category, Airbnb
+from models import POI, TrailRating, Category, Airbnb, AirbnbNearbyTrail, db
 from sqlalchemy import desc, func
+from geo import nearest_within
+from spatial_index import find_nearby_pois, query_pois_within
 import logging
-import math
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def calculate_distance(lat1, lng1, lat2, lng2):
-    """
-    Calculate distance between two coordinates using Haversine formula
-    
-    Args:
-        lat1, lng1: Coordinates of point 1
-        lat2, lng2: Coordinates of point 2
-        
-    Returns:
-        float: Distance in kilometers
-    """
-    # Radius of the Earth in km
-    R = 6371.0
-    
-    # Convert degrees to radians
-    lat1_rad = math.radians(lat1)
-    lng1_rad = math.radians(lng1)
-    lat2_rad = math.radians(lat2)
-    lng2_rad = math.radians(lng2)
-    
-    # Differences in coordinates
-    dlat = lat2_rad - lat1_rad
-    dlng = lng2_rad - lng1_rad
-    
-    # Haversine formula
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-    
-    return distance
+# Defaults for the precomputed Airbnb -> trail table, overridable through
+# NEARBY_TRAILS_RADIUS_KM and NEARBY_TRAILS_TOP_N in the app config
+NEARBY_TRAILS_RADIUS_KM = 25
+NEARBY_TRAILS_TOP_N = 20
+
+# Number of Airbnbs per distance matrix chunk during a full rebuild
+REBUILD_CHUNK_SIZE = 200
 
 def get_trails_category_id():
     """Get the category ID for hiking trails"""
@@ -164,22 +140,162 @@ def get_trails_near_airbnb(airbnb_id, max_distance=10, limit=5):
     if not category_id:
         return []
     
-    # Get all trails
-    trails = POI.query.filter_by(category_id=category_id).all()
-    
-    # Calculate distance to each trail and filter
-    nearby_trails = []
-    for trail in trails:
-        distance = calculate_distance(airbnb_lat, airbnb_lng, trail.lat, trail.lng)
-        if distance <= max_distance:
-            nearby_trails.append({
-                'trail': trail,
-                'distance': distance
-            })
-    
-    # Sort by distance and limit results
-    nearby_trails.sort(key=lambda x: x['distance'])
-    return nearby_trails[:limit]
+    # Serve from the precomputed table when the request fits inside it,
+    # otherwise look up the closest trails without loading every trail row
+    matches = get_precomputed_nearby_trails(airbnb_id, max_distance, limit)
+    if not matches:
+        matches = find_nearby_pois(category_id, airbnb_lat, airbnb_lng, max_distance, limit)
+    if not matches:
+        return []
+    
+    # Load only the trails that made the cut
+    trails_by_id = {
+        trail.id: trail
+        for trail in POI.query.filter(POI.id.in_([poi_id for poi_id, _ in matches])).all()
+    }
+    
+    return [
+        {'trail': trails_by_id[poi_id], 'distance': distance}
+        for poi_id, distance in matches
+        if poi_id in trails_by_id
+    ]
+
+def _nearby_trails_settings():
+    """Return the (radius_km, top_n) used for the precomputed table"""
+    return (
+        current_app.config.get('NEARBY_TRAILS_RADIUS_KM', NEARBY_TRAILS_RADIUS_KM),
+        current_app.config.get('NEARBY_TRAILS_TOP_N', NEARBY_TRAILS_TOP_N)
+    )
+
+def get_precomputed_nearby_trails(airbnb_id, max_distance, limit):
+    """
+    Read the nearest trails of an Airbnb from the precomputed table
+    
+    Args:
+        airbnb_id (int): ID of the Airbnb
+        max_distance (float): Maximum distance in kilometers
+        limit (int): Maximum number of trails to return
+        
+    Returns:
+        list: (poi_id, distance_km) tuples sorted by distance, or an empty
+        list when the table cannot answer the request
+    """
+    radius_km, top_n = _nearby_trails_settings()
+    if max_distance > radius_km or limit > top_n:
+        return []
+    
+    rows = db.session.query(AirbnbNearbyTrail.poi_id, AirbnbNearbyTrail.distance_km).filter(
+        AirbnbNearbyTrail.airbnb_id == airbnb_id,
+        AirbnbNearbyTrail.distance_km <= max_distance
+    ).order_by(AirbnbNearbyTrail.distance_km).limit(limit).all()
+    
+    return [(poi_id, distance) for poi_id, distance in rows]
+
+def _replace_nearby_trails(nearest_by_airbnb):
+    """Replace the stored rows for the given Airbnbs with freshly computed ones"""
+    if not nearest_by_airbnb:
+        return
+    
+    AirbnbNearbyTrail.query.filter(
+        AirbnbNearbyTrail.airbnb_id.in_(list(nearest_by_airbnb.keys()))
+    ).delete(synchronize_session=False)
+    
+    db.session.bulk_insert_mappings(AirbnbNearbyTrail, [
+        {'airbnb_id': airbnb_id, 'poi_id': poi_id, 'distance_km': distance}
+        for airbnb_id, nearest in nearest_by_airbnb.items()
+        for poi_id, distance in nearest
+    ])
+
+def rebuild_nearby_trails():
+    """
+    Rebuild the precomputed nearest trails for every Airbnb
+    
+    Distances are computed in chunks of Airbnbs against all trails using the
+    batched distance matrix, keeping only the nearest trails within the radius.
+    
+    Returns:
+        int: Number of Airbnbs processed
+    """
+    category_id = get_trails_category_id()
+    if not category_id:
+        return 0
+    
+    radius_km, top_n = _nearby_trails_settings()
+    airbnbs = db.session.query(Airbnb.id, Airbnb.lat, Airbnb.lng).all()
+    trails = db.session.query(POI.id, POI.lat, POI.lng).filter(POI.category_id == category_id).all()
+    trail_lats = [trail.lat for trail in trails]
+    trail_lngs = [trail.lng for trail in trails]
+    
+    AirbnbNearbyTrail.query.delete(synchronize_session=False)
+    
+    for start in range(0, len(airbnbs), REBUILD_CHUNK_SIZE):
+        chunk = airbnbs[start:start + REBUILD_CHUNK_SIZE]
+        nearest = nearest_within(
+            [airbnb.lat for airbnb in chunk], [airbnb.lng for airbnb in chunk],
+            trail_lats, trail_lngs, radius_km, top_n
+        )
+        _replace_nearby_trails({
+            airbnb.id: [(trails[index].id, distance) for index, distance in trail_distances]
+            for airbnb, trail_distances in zip(chunk, nearest)
+        })
+    
+    db.session.commit()
+    logger.info(f"Rebuilt nearby trails for {len(airbnbs)} Airbnbs")
+    return len(airbnbs)
+
+def refresh_nearby_trails_for_airbnbs(airbnb_ids):
+    """
+    Recompute the precomputed nearest trails for specific Airbnbs
+    
+    Args:
+        airbnb_ids (list): IDs of new or moved Airbnbs
+    """
+    category_id = get_trails_category_id()
+    if not category_id or not airbnb_ids:
+        return
+    
+    radius_km, top_n = _nearby_trails_settings()
+    airbnbs = db.session.query(Airbnb.id, Airbnb.lat, Airbnb.lng).filter(Airbnb.id.in_(list(airbnb_ids))).all()
+    
+    _replace_nearby_trails({
+        airbnb.id: query_pois_within(category_id, airbnb.lat, airbnb.lng, radius_km)[:top_n]
+        for airbnb in airbnbs
+    })
+    db.session.commit()
+
+def refresh_nearby_trails_for_trails(trail_ids):
+    """
+    Update the precomputed nearest trails after trails were added or moved
+    
+    Only Airbnbs within the configured radius of one of the trails, or
+    already listing one of them (a moved trail may now be out of their
+    radius), can see their list change, so only those are recomputed.
+    
+    Args:
+        trail_ids (list): IDs of new or moved trails
+    """
+    if not trail_ids:
+        return
+    
+    radius_km, _ = _nearby_trails_settings()
+    trail_ids = list(trail_ids)
+    trails = db.session.query(POI.lat, POI.lng).filter(POI.id.in_(trail_ids)).all()
+    airbnbs = db.session.query(Airbnb.id, Airbnb.lat, Airbnb.lng).all()
+    if not trails or not airbnbs:
+        return
+    
+    nearest = nearest_within(
+        [airbnb.lat for airbnb in airbnbs], [airbnb.lng for airbnb in airbnbs],
+        [trail.lat for trail in trails], [trail.lng for trail in trails], radius_km, 1
+    )
+    affected_ids = {airbnb.id for airbnb, trail_distances in zip(airbnbs, nearest) if trail_distances}
+    # Airbnbs near a trail's previous position still list it
+    affected_ids.update(
+        airbnb_id for (airbnb_id,) in db.session.query(AirbnbNearbyTrail.airbnb_id).filter(
+            AirbnbNearbyTrail.poi_id.in_(trail_ids)
+        ).distinct()
+    )
+    refresh_nearby_trails_for_airbnbs(list(affected_ids))
 
 def get_popular_trails(limit=5):
     """
@@ -4,62 +4,127 @@ This module provides functions to fetch data from external trekking APIs
 and integrate it with our database.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import json
 import os
 import random
 import time
-from models import POI, Category, db
+from datetime import datetime, timezone
+from trail_import import TrailImporter, import_trails
+from sync_history import get_last_watermark, save_sync_history
 from flask import current_app
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Constants for the API
-API_BASE_URL = "https://hiking-trails-api.example.com/api/v1"  # Replace with actual API URL
+API_BASE_URL = os.environ.get("TREKKING_API_URL", "https://hiking-trails-api.example.com/api/v1")  # Replace with actual API URL
 DEFAULT_REGION = "trentino-alto-adige"  # Default region in Italy for our search
+API_PAGE_SIZE = 100  # Trails requested per page
+API_TIMEOUT = 10  # Seconds to wait for a page
 
+# Where each region's watermark and the next page of an interrupted sync are kept
+SYNC_STATE_FILE = "trekking_sync_state.json"
 
-def fetch_trails_from_api(region=DEFAULT_REGION, limit=10):
+# Pooled session shared by all API requests, see get_api_session()
+_session = None
+
+
+def get_api_session():
     """
-    Fetch trail data from the external trekking API
+    Shared HTTP session for the trekking API
+    
+    Keeps connections alive across requests and pages, and retries transient
+    failures (connection errors, 429 and 5xx responses) with backoff.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",)
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def iter_trail_pages(region=DEFAULT_REGION, page_size=API_PAGE_SIZE, start_page=1, updated_since=None,
+                     session=None):
+    """
+    Fetch trails from the trekking API one page at a time
+    
+    Follows the API's pagination: a "next_page" number in the response, or
+    otherwise the next page number as long as pages come back full.
     
     Args:
         region (str): The region to search for trails
-        limit (int): Maximum number of trails to fetch
+        page_size (int): Number of trails requested per page
+        start_page (int): First page to fetch, for resuming an interrupted sync
+        updated_since (str): Only request trails changed after this ISO timestamp
+        session (requests.Session): Session to use instead of the shared one
         
-    Returns:
-        list: List of trail objects
-    """
-    try:
-        # If we need an API key, check for it
-        api_key = os.environ.get('TREKKING_API_KEY')
-        if not api_key:
-            logger.warning("No TREKKING_API_KEY found in environment variables")
-            return []
-            
-        # Sample API endpoint
-        endpoint = f"{API_BASE_URL}/trails"
+    Yields:
+        tuple: (page number, list of trail objects)
         
+    Raises:
+        requests.RequestException: If a page cannot be fetched
+    """
+    api_key = os.environ.get('TREKKING_API_KEY')
+    if not api_key:
+        logger.warning("No TREKKING_API_KEY found in environment variables")
+        return
+    
+    session = session or get_api_session()
+    endpoint = f"{API_BASE_URL}/trails"
+    page = start_page
+    
+    while page:
         # Request parameters - adjust based on the actual API
         params = {
             "region": region,
-            "limit": limit,
+            "page": page,
+            "limit": page_size,
             "api_key": api_key
         }
+        if updated_since:
+            params["updated_since"] = updated_since
+        response = session.get(endpoint, params=params, timeout=API_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
         
-        # Make the API request
-        response = requests.get(endpoint, params=params, timeout=10)
+        trails = data.get('trails') or []
+        logger.info(f"Fetched page {page} with {len(trails)} trails from API")
+        yield page, trails
         
-        # Check for successful response
-        if response.status_code == 200:
-            data = response.json()
-            logger.info(f"Successfully fetched {len(data['trails'])} trails from API")
-            return data['trails']
+        if 'next_page' in data:
+            page = data['next_page']
         else:
-            logger.error(f"API request failed with status code {response.status_code}: {response.text}")
-            return []
+            page = page + 1 if len(trails) >= page_size else None
+
+
+def fetch_trails_from_api(region=DEFAULT_REGION, limit=10):
+    """
+    Fetch trail data from the external trekking API
+    
+    Args:
+        region (str): The region to search for trails
+        limit (int): Maximum number of trails to fetch
+        
+    Returns:
+        list: List of trail objects
+    """
+    try:
+        # A single page is enough for a `limit`-sized sample
+        for _, trails in iter_trail_pages(region=region, page_size=limit):
+            logger.info(f"Successfully fetched {len(trails)} trails from API")
+            return trails[:limit]
+        return []
             
     except requests.RequestException as e:
         logger.error(f"Error fetching data from trekking API: {str(e)}")
@@ -72,6 +137,190 @@ def fetch_trails_from_api(region=DEFAULT_REGION, limit=10):
         return []
 
 
+def _load_sync_state():
+    """Read the watermarks and resume points of the syncs, keyed by region"""
+    try:
+        if os.path.exists(SYNC_STATE_FILE):
+            with open(SYNC_STATE_FILE, 'r') as f:
+                return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading sync state: {str(e)}")
+    return {}
+
+
+def _save_sync_state(state):
+    """Write the sync state atomically"""
+    temp_file = f"{SYNC_STATE_FILE}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_file, SYNC_STATE_FILE)
+
+
+def sync_trails_from_api(region=DEFAULT_REGION, limit=None, page_size=API_PAGE_SIZE, resume=True, full=False,
+                         progress=None):
+    """
+    Stream the trails changed since the last sync into the database page by page
+    
+    Only changes after the region's watermark (the latest updated_at of the
+    last complete sync, kept in the sync state) are requested, unless
+    `full` is set. New trails are inserted and known ones updated. Each page
+    is imported and committed as soon as it arrives, then recorded as
+    completed, so an interrupted sync (or one stopped by `limit`) resumes
+    from the next page on the following call. Page numbers only mean
+    something for a given page size, so a resumed sync keeps requesting
+    pages of the size it started with.
+    
+    Args:
+        region (str): The region to search for trails
+        limit (int): Stop after this many trails were fetched (whole pages)
+        page_size (int): Number of trails requested per page
+        resume (bool): Continue after the last completed page of a previous sync
+        full (bool): Request the whole catalogue instead of the changes,
+            discarding the resume point of a previous sync
+        progress (callable): Called with the number of trails fetched after each page
+        
+    Returns:
+        dict: Trails fetched, inserted, updated and skipped, pages fetched,
+        whether the sync reached the end, and the new watermark (None
+        until it does)
+    """
+    if limit:
+        page_size = min(page_size, limit)
+    
+    state = _load_sync_state()
+    region_state = state.get(region, {})
+    # Regions last synced before the state kept it only have it in the sync history
+    watermark = region_state.get('watermark') or get_last_watermark(region)
+    resume_point = region_state.get('resume', {}) if resume and not full else {}
+    start_page = resume_point.get('next_page', 1)
+    if start_page > 1:
+        page_size = resume_point['page_size']
+        logger.info(f"Resuming trail sync for {region} at page {start_page} of {page_size} trails")
+        updated_since = resume_point.get('updated_since')
+    else:
+        updated_since = None if full else watermark
+    latest_change = _parse_timestamp(resume_point.get('latest_change') or updated_since)
+    
+    importer = TrailImporter(category_name='trails')
+    fetched = pages = 0
+    complete = True
+    
+    try:
+        for page, trails in iter_trail_pages(region=region, page_size=page_size, start_page=start_page,
+                                             updated_since=updated_since):
+            rows = _to_import_rows(trails)
+            importer.add(rows)
+            importer.flush()
+            fetched += len(trails)
+            pages += 1
+            
+            changes = [row['updated_at'] for row in rows if row['updated_at']]
+            if changes:
+                latest_change = max(changes + [latest_change] if latest_change else changes)
+            
+            state[region] = {
+                'watermark': watermark,
+                'resume': {
+                    'next_page': page + 1,
+                    'page_size': page_size,
+                    'updated_since': updated_since,
+                    'latest_change': latest_change.isoformat() if latest_change else None,
+                    'updated_at': time.time()
+                }
+            }
+            _save_sync_state(state)
+            if progress:
+                progress(fetched, message=f"Imported page {page}")
+            
+            if limit and fetched >= limit:
+                complete = False
+                break
+    finally:
+        result = importer.finish()
+    
+    if complete:
+        # The changes were read to the end: the next sync starts from the
+        # first page of the changes after the latest one received
+        if latest_change:
+            watermark = latest_change.isoformat()
+        state[region] = {'watermark': watermark}
+        _save_sync_state(state)
+    
+    result.update({
+        "fetched": fetched,
+        "pages": pages,
+        "complete": complete,
+        "watermark": latest_change.isoformat() if complete and latest_change else None
+    })
+    return result
+
+
+def run_trail_sync(region=DEFAULT_REGION, limit=None, resume=True, full=False, progress=None):
+    """
+    Sync trails from the API and record the outcome in the sync history
+    
+    Runs as a background job for the update-from-api endpoint.
+    
+    Returns:
+        dict: Summary of the sync operation
+    """
+    try:
+        result = sync_trails_from_api(region=region, limit=limit, resume=resume, full=full, progress=progress)
+    except Exception as e:
+        save_sync_history("error", f"Error: {str(e)}", region=region)
+        raise
+    
+    # Save sync history, with the watermark the next delta sync starts from
+    message = (f"Successfully imported {result['inserted']} new trails and updated {result['updated']} from API "
+               f"({result['fetched']} fetched in {result['pages']} pages)")
+    if not result['complete']:
+        message += ", the next sync continues where this one stopped"
+    save_sync_history("success", message, region=region, watermark=result['watermark'])
+    
+    return {
+        "status": "success" if result['inserted'] or result['updated'] else "no_changes",
+        "imported_count": result['inserted'],
+        "updated_count": result['updated'],
+        "skipped_count": result['skipped'],
+        "fetched_count": result['fetched'],
+        "complete": result['complete'],
+        "timestamp": time.time()
+    }
+
+
+def _parse_timestamp(value):
+    """Parse an ISO 8601 timestamp from the API into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        logger.warning(f"Ignoring invalid timestamp from API: {value!r}")
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _to_import_rows(trails_data):
+    """Map the API's field names onto the importer's"""
+    return [
+        {
+            'name': trail.get('name'),
+            'lat': trail.get('lat') or trail.get('latitude'),
+            'lng': trail.get('lng') or trail.get('longitude'),
+            'description': trail.get('description', ''),
+            'url': trail.get('url', ''),
+            'path': trail.get('path') or trail.get('coordinates') or [],
+            'difficulty_rating': trail.get('difficulty', 0),
+            'rating_count': trail.get('rating_count', 0),
+            'external_id': str(trail['id']) if trail.get('id') is not None else None,
+            'updated_at': _parse_timestamp(trail.get('updated_at'))
+        }
+        for trail in trails_data
+    ]
+
+
 def import_trails_to_database(trails_data, category_name="trails"):
     """
     Import trail data from the API into our database
@@ -86,69 +335,15 @@ def import_trails_to_database(trails_data, category_name="trails"):
     if not trails_data:
         return 0
         
-    # Get the trails category
-    category = Category.query.filter_by(name=category_name).first()
-    if not category:
-        logger.error(f"Category '{category_name}' not found in database")
+    try:
+        result = import_trails(_to_import_rows(trails_data), category_name=category_name)
+    except Exception as e:
+        logger.error(f"Error importing trails: {str(e)}")
         return 0
     
-    imported_count = 0
-    
-    # Process each trail from the API
-    for trail in trails_data:
-        try:
-            # Check if we already have this trail (by name or other identifier)
-            existing_trail = POI.query.filter_by(
-                name=trail.get('name'),
-                category_id=category.id
-            ).first()
-            
-            if existing_trail:
-                logger.info(f"Trail '{trail.get('name')}' already exists in database (ID: {existing_trail.id})")
-                continue
-                
-            # Extract trail data - adjust these field names based on the actual API response
-            name = trail.get('name')
-            lat = trail.get('lat') or trail.get('latitude')
-            lng = trail.get('lng') or trail.get('longitude')
-            description = trail.get('description', '')
-            url = trail.get('url', '')
-            
-            # Extract the path data if available
-            path = trail.get('path') or trail.get('coordinates') or []
-            
-            # Create a new POI for this trail
-            new_trail = POI(
-                name=name,
-                lat=lat,
-                lng=lng,
-                description=description,
-                url=url,
-                category_id=category.id,
-                path=path,
-                difficulty_rating=trail.get('difficulty', 0),
-                rating_count=trail.get('rating_count', 0)
-            )
-            
-            # Add to database
-            db.session.add(new_trail)
-            imported_count += 1
-            
-            # Commit every few trails to avoid large transactions
-            if imported_count % 10 == 0:
-                db.session.commit()
-                
-        except Exception as e:
-            logger.error(f"Error importing trail '{trail.get('name')}': {str(e)}")
-            # Continue with the next trail rather than failing the whole import
-            continue
-    
-    # Final commit
-    if imported_count > 0:
-        db.session.commit()
-        
-    logger.info(f"Successfully imported {imported_count} new trails to database")
-    return imported_count
+    logger.info(f"Successfully imported {result['inserted']} new trails to database "
+                f"({result['skipped']} already present or invalid)")
+    return result['inserted']
 
 
 def update_trails_from_api():
@@ -159,15 +354,12 @@ def update_trails_from_api():
         dict: Summary of the update operation
     """
     with current_app.app_context():
-        # Fetch trails from API
-        trails_data = fetch_trails_from_api()
-        
-        # Import to database
-        imported_count = import_trails_to_database(trails_data)
+        # Stream the API's pages into the database
+        result = sync_trails_from_api()
         
         return {
-            "status": "success" if imported_count > 0 else "no_changes",
-            "imported_count": imported_count,
+            "status": "success" if result['inserted'] > 0 else "no_changes",
+            "imported_count": result['inserted'],
             "timestamp": time.time()
         }
 
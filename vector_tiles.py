@@ -0,0 +1,240 @@
+"""
+Mapbox Vector Tiles for Italian Alps Vacation Planner
+
+This module encodes POIs and trail paths into Mapbox Vector Tiles (MVT 2.1).
+Every category becomes a point layer named after it and trail paths go into
+a "trail_paths" line layer, simplified for the tile's zoom level. Encoded
+tiles are cached on disk under a directory per dataset version.
+"""
+
+import logging
+import math
+import os
+import shutil
+import struct
+
+from geo import decode_polyline
+from map_data import build_pois_by_category
+
+logger = logging.getLogger(__name__)
+
+# Resolution of tile coordinates
+TILE_EXTENT = 4096
+
+# Name of the layer holding trail polylines
+TRAIL_PATHS_LAYER = "trail_paths"
+
+# Default location of the on-disk tile cache (overridable with TILE_CACHE_DIR)
+DEFAULT_TILE_CACHE_DIR = "tile_cache"
+
+# MVT geometry types and commands
+GEOM_POINT = 1
+GEOM_LINESTRING = 2
+CMD_MOVE_TO = 1
+CMD_LINE_TO = 2
+
+
+def tile_bounds(z, x, y):
+    """
+    Return the (south, west, north, east) bounds of a web mercator tile
+    """
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+
+def _project(lat, lng, z, x, y):
+    """Project a coordinate to integer tile coordinates"""
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    lat_rad = math.radians(lat)
+    world_x = (lng + 180.0) / 360.0 * n
+    world_y = (1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2 * n
+    return round((world_x - x) * TILE_EXTENT), round((world_y - y) * TILE_EXTENT)
+
+
+# Protocol buffer encoding helpers
+def _varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number, wire_type, payload):
+    key = _varint((number << 3) | wire_type)
+    if wire_type == 0:
+        return key + _varint(payload)
+    if wire_type == 1:
+        return key + payload
+    # Length-delimited
+    return key + _varint(len(payload)) + payload
+
+
+def _packed(number, values):
+    return _field(number, 2, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value):
+    """Encode a property value as an MVT Value message"""
+    if isinstance(value, bool):
+        return _field(7, 0, int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _field(5, 0, value)
+        return _field(6, 0, _zigzag(value))
+    if isinstance(value, float):
+        return _field(3, 1, struct.pack("<d", value))
+    return _field(1, 2, str(value).encode("utf-8"))
+
+
+def _encode_geometry(geom_type, points):
+    """Encode projected points as MVT geometry commands"""
+    commands = []
+    cursor_x = cursor_y = 0
+    for index, (px, py) in enumerate(points):
+        if index == 0:
+            commands.append(CMD_MOVE_TO | (1 << 3))
+        elif index == 1:
+            commands.append(CMD_LINE_TO | ((len(points) - 1) << 3))
+        commands.append(_zigzag(px - cursor_x))
+        commands.append(_zigzag(py - cursor_y))
+        cursor_x, cursor_y = px, py
+    return commands
+
+
+def _encode_layer(name, features):
+    """
+    Encode a layer
+    
+    Args:
+        name (str): Layer name
+        features (list): (feature_id, geom_type, points, properties) tuples
+    """
+    keys = {}
+    values = {}
+    encoded_features = []
+    
+    for feature_id, geom_type, points, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        
+        message = _field(1, 0, feature_id)
+        if tags:
+            message += _packed(2, tags)
+        message += _field(3, 0, geom_type)
+        message += _packed(4, _encode_geometry(geom_type, points))
+        encoded_features.append(message)
+    
+    layer = _field(15, 0, 2) + _field(1, 2, name.encode("utf-8"))
+    for message in encoded_features:
+        layer += _field(2, 2, message)
+    for key in keys:
+        layer += _field(3, 2, key.encode("utf-8"))
+    for value_type, value in values:
+        layer += _field(4, 2, _encode_value(value))
+    layer += _field(5, 0, TILE_EXTENT)
+    return layer
+
+
+def build_tile(z, x, y):
+    """
+    Encode the POIs and trail paths intersecting a tile
+    
+    Returns:
+        bytes: The MVT-encoded tile (empty if there is nothing to draw)
+    """
+    # Paths come back normalized and simplified for the zoom level
+    pois_by_category = build_pois_by_category(bbox=tile_bounds(z, x, y), zoom=z)
+    
+    layers = []
+    trail_features = []
+    for category_name, pois in pois_by_category.items():
+        point_features = []
+        for poi in pois:
+            properties = {
+                "id": poi["id"],
+                "category": category_name,
+                "name": poi["name"],
+                "url": poi["url"] or None,
+                "difficulty_rating": float(poi["difficulty_rating"] or 0),
+                "rating_count": int(poi["rating_count"] or 0)
+            }
+            point_features.append((poi["id"], GEOM_POINT, [_project(poi["lat"], poi["lng"], z, x, y)], properties))
+            
+            if poi["path"]:
+                points = []
+                for lat, lng in decode_polyline(poi["path"]):
+                    projected = _project(lat, lng, z, x, y)
+                    # Drop vertices that collapse onto the previous one at this zoom
+                    if not points or projected != points[-1]:
+                        points.append(projected)
+                if len(points) >= 2:
+                    trail_features.append((poi["id"], GEOM_LINESTRING, points, properties))
+        
+        if point_features:
+            layers.append(_encode_layer(category_name, point_features))
+    
+    if trail_features:
+        layers.append(_encode_layer(TRAIL_PATHS_LAYER, trail_features))
+    
+    return b"".join(_field(3, 2, layer) for layer in layers)
+
+
+def get_tile(z, x, y, version, cache_dir=DEFAULT_TILE_CACHE_DIR):
+    """
+    Return an encoded tile, reading it from the on-disk cache when possible
+    
+    Tiles are stored under <cache_dir>/<version>/<z>/<x>/<y>.mvt. When the
+    first tile of a new dataset version is written, the directories of older
+    versions are removed.
+    """
+    version_dir = os.path.join(cache_dir, str(version))
+    tile_path = os.path.join(version_dir, str(z), str(x), f"{y}.mvt")
+    
+    try:
+        with open(tile_path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    
+    tile = build_tile(z, x, y)
+    
+    try:
+        if not os.path.isdir(version_dir):
+            _remove_old_versions(cache_dir, str(version))
+        os.makedirs(os.path.dirname(tile_path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial tile
+        temp_path = f"{tile_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(tile)
+        os.replace(temp_path, tile_path)
+    except OSError as e:
+        logger.error(f"Error caching tile {z}/{x}/{y}: {str(e)}")
+    
+    return tile
+
+
+def _remove_old_versions(cache_dir, current_version):
+    """Delete cached tiles of dataset versions older than the current one"""
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.isdigit() and int(name) < int(current_version):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)